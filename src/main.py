@@ -3,11 +3,12 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
 from src.models.wiki import db, WikiDocument, WikiChunk
 from src.routes.user import user_bp
 from src.routes.wiki import wiki_bp
+from src.services.static_assets import StaticAssetManifest
 from flask_jwt_extended import JWTManager
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -29,9 +30,25 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# "pipeline": assets com hash, pré-comprimidos e servidos do manifesto em memória.
+# "direct": serve os arquivos do disco a cada requisição (útil ao editar o frontend).
+STATIC_ASSETS_MODE = os.getenv("STATIC_ASSETS_MODE", "pipeline")
+static_manifest = None
+if STATIC_ASSETS_MODE == "pipeline" and app.static_folder:
+    static_manifest = StaticAssetManifest(app.static_folder)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
+    if static_manifest is not None:
+        asset = static_manifest.get(path) if path else None
+        if asset is not None:
+            return static_manifest.response(asset, path, request)
+        index = static_manifest.get('index.html')
+        if index is None:
+            return "index.html not found", 404
+        return static_manifest.response(index, 'index.html', request)
+
     static_folder_path = app.static_folder
     if static_folder_path is None:
             return "Static folder not configured", 404
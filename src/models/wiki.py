@@ -14,7 +14,18 @@ class WikiDocument(db.Model):
 
     # Relacionamento com chunks (1 documento tem muitos chunks)
     chunks = db.relationship('WikiChunk', backref='document', cascade="all, delete-orphan")
+    # Tokens do título usados pelo índice de títulos (ver WikiTitleToken)
+    title_tokens = db.relationship('WikiTitleToken', backref='document', cascade="all, delete-orphan")
     
+    def to_dict(self):
+        """Serializa apenas os campos leves (o `content` completo nunca é incluído)."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'url': self.url,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
     def __repr__(self):
         return f'<WikiDocument {self.title}>'
 
@@ -31,3 +42,27 @@ class WikiChunk(db.Model):
     
     def __repr__(self):
         return f'<WikiChunk {self.id} doc_id={self.document_id}>'
+
+class WikiTitleToken(db.Model):
+    """Índice de títulos gravado na ingestão: token normalizado (palavra ou código) -> documento."""
+    __tablename__ = 'wiki_title_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('wiki_documents.id'), nullable=False, index=True)
+    token = db.Column(db.String(100), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<WikiTitleToken {self.token} doc_id={self.document_id}>'
+
+class WikiPageRevision(db.Model):
+    """Estado da sincronização incremental: última revisão indexada de cada página."""
+    __tablename__ = 'wiki_page_revisions'
+
+    page_id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(255), nullable=False)
+    rev_id = db.Column(db.Integer, nullable=False)
+    source = db.Column(db.String(20), nullable=False)  # 'dump' ou 'api'
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f'<WikiPageRevision {self.page_id} rev={self.rev_id}>'
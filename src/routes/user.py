@@ -1,7 +1,8 @@
-import os
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import create_access_token
 from src.services.wiki_extractor import MediaWikiExtractor
+from src.services.wiki_registry import UnknownWikiError, WikiSelectionError
+from src.routes.wiki import wiki_registry
 
 user_bp = Blueprint('user', __name__)
 
@@ -14,8 +15,11 @@ def login():
     username = data.get('username')
     password = data.get('password')
 
-    # NOVO: Pega o URL da Wiki a partir das variáveis de ambiente
-    wiki_url = os.getenv("MEDIAWIKI_URL")
+    # Autentica contra a Wiki pedida (ou a padrão do registro)
+    try:
+        wiki_url = wiki_registry.get(data.get('wiki')).url
+    except (UnknownWikiError, WikiSelectionError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
     if not all([username, password, wiki_url]):
         return jsonify({"status": "error", "message": "Faltam dados (usuário, senha ou URL da Wiki não configurado no backend)"}), 400
@@ -1,23 +1,116 @@
 from flask import Blueprint, request, jsonify
-from src.models.wiki import db, WikiDocument, WikiChunk
+from src.models.wiki import WikiDocument, WikiChunk, WikiPageRevision, WikiTitleToken
 from src.services.wiki_extractor import MediaWikiExtractor
-from src.services.embedding_service import EmbeddingService
+from src.services.title_index import index_document_title
+from src.services.wiki_registry import UnknownWikiError, WikiRegistry, WikiSelectionError
 from src.services.qa_service import QAService
-import re
+from src.services.query_batcher import EncodeQueueFull
+from src.services.answer_cache import SemanticAnswerCache
+from src.services.retrieval_eval import DEFAULT_RETRIEVAL_CONFIG, latency_summary, ranked_titles, retrieve_batch
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import defer, load_only
 import os
+import time
 
 wiki_bp = Blueprint('wiki', __name__)
 
 # Inicializar serviços
-embedding_service = None
+DATABASE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'database')
+wiki_registry = WikiRegistry.from_env(DATABASE_DIR)
 qa_service = QAService()
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+)
 
-def get_embedding_service():
-    """Lazy loading do serviço de embeddings"""
-    global embedding_service
-    if embedding_service is None:
-        embedding_service = EmbeddingService()
-    return embedding_service
+# Limites de paginação das rotas de listagem/busca
+MAX_SEARCH_LIMIT = 50
+# Tamanho fixo do conjunto de vizinhos reordenado pela /search; as páginas são fatias dele
+SEARCH_RERANK_POOL = 100
+MAX_DOCUMENTS_PAGE = 200
+MAX_BATCH_QUESTIONS = 50
+
+# Tipo e faixa aceitos para cada parâmetro de busca de /ask/batch (valores fora são limitados)
+RETRIEVAL_CONFIG_LIMITS = {
+    'n_results': (int, 1, MAX_SEARCH_LIMIT),
+    'n_candidates': (int, 1, 500),
+    'keyword_bonus': (float, 0, 100),
+    'all_keywords_bonus': (float, 0, 100),
+}
+
+def watch_wiki_documents(wiki):
+    """Respostas que usaram documentos re-ingeridos da Wiki deixam de ser servidas do cache."""
+    def invalidate(document_id):
+        answer_cache.invalidate_matching(
+            lambda key: key[0] == wiki.name and (document_id is None or key[1] == document_id)
+        )
+    wiki.embedding_service.document_removed_listeners.append(invalidate)
+
+wiki_registry.service_created_listeners.append(watch_wiki_documents)
+
+def answer_cache_keys(relevant_chunks: list) -> set:
+    """
+    Chaves do cache de respostas: (wiki, document_id, created_at) de cada documento usado.
+    O created_at muda quando a página é re-ingerida, mesmo em outro processo (ex: CLI
+    ingest_dump) e mesmo que o SQLite reutilize o id, então respostas antigas não casam mais.
+    """
+    ids_by_wiki = {}
+    for chunk in relevant_chunks:
+        ids_by_wiki.setdefault(chunk['metadata']['wiki'], set()).add(chunk['metadata']['document_id'])
+
+    keys = set()
+    for wiki_name, document_ids in ids_by_wiki.items():
+        created = dict(wiki_registry.get(wiki_name).session.query(
+            WikiDocument.id, WikiDocument.created_at
+        ).filter(WikiDocument.id.in_(document_ids)).all())
+        keys.update((wiki_name, document_id, str(created.get(document_id))) for document_id in document_ids)
+    return keys
+
+def parse_bool(value) -> bool:
+    """Interpreta flags do JSON aceitando também textos ("true", "false", "1", "0")."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'sim')
+    return bool(value)
+
+def get_embedding_service(wiki_name: str = None):
+    """Lazy loading do serviço de embeddings (da Wiki padrão, se nenhuma for indicada)"""
+    return wiki_registry.embedding_service(wiki_registry.get(wiki_name))
+
+@wiki_bp.teardown_app_request
+def remove_wiki_sessions(exception=None):
+    wiki_registry.remove_sessions()
+
+def sources_with_links(sources: list) -> list:
+    """
+    Converte as fontes devolvidas pelo serviço de QA (dicionários com 'title' e 'wiki') na
+    lista {título, url, wiki} usada pelo frontend, com uma consulta por Wiki envolvida.
+    """
+    if not sources:
+        return []
+
+    url_maps = {}
+    for wiki_name in {source.get('wiki') for source in sources}:
+        titles_for_query = [source['title'] for source in sources if source.get('wiki') == wiki_name]
+        documentos = wiki_registry.get(wiki_name).session.query(WikiDocument).options(
+            load_only(WikiDocument.title, WikiDocument.url)
+        ).filter(WikiDocument.title.in_(titles_for_query)).all()
+        url_maps[wiki_name] = {doc.title: doc.url for doc in documentos}
+
+    return [{
+        'title': source['title'],
+        'url': url_maps[source.get('wiki')].get(source['title'], '#'),
+        'wiki': source.get('wiki') or wiki_registry.default_name
+    } for source in sources]
+
+@wiki_bp.route('/wikis', methods=['GET'])
+def list_wikis():
+    """Lista as Wikis registradas"""
+    return jsonify({
+        'default': wiki_registry.default_name,
+        'wikis': [{'name': wiki.name, 'url': wiki.url, 'collection': wiki.collection_name}
+                  for wiki in wiki_registry.wikis.values()]
+    })
 
 # Dentro do teu ficheiro de rotas da API
 
@@ -25,12 +118,21 @@ def get_embedding_service():
 def extract_wiki_content():
     """
     Extrai conteúdo da Wiki com logging de micro-depuração para cada etapa.
+
+    A extração é incremental: a revisão de cada página fica em WikiPageRevision (source 'api')
+    e só as páginas com revisão nova são baixadas e reindexadas. Páginas apagadas da Wiki
+    permanecem até uma extração completa.
+
+    Body JSON (opcional): {"wiki": "suporte", "full": true}; sem "wiki" é usada a Wiki padrão e
+    com "full" as bases são apagadas e tudo é extraído de novo.
     """
     try:
-        data = request.get_json()
-        wiki_url = os.getenv('MEDIAWIKI_URL')
-        username = os.getenv("WIKI_USERNAME")
-        password = os.getenv("WIKI_PASSWORD")
+        data = request.get_json(silent=True) or {}
+        wiki = wiki_registry.get(data.get('wiki'))
+        session = wiki.session
+        wiki_url = wiki.url
+        username = wiki.username
+        password = wiki.password
         
         if not wiki_url:
             return jsonify({'error': 'URL da Wiki é obrigatória'}), 400
@@ -42,16 +144,23 @@ def extract_wiki_content():
             if not extractor.login(username, password):
                 return jsonify({'error': 'Falha ao autenticar com a Wiki'}), 401
         
-        print("Limpando bases de dados...")
-        WikiChunk.query.delete()
-        WikiDocument.query.delete()
-        db.session.commit()
-        embedding_svc = get_embedding_service()
-        embedding_svc.clear_vectordb()
-        
-        wiki_content = extractor.extract_all_content()
-        if not wiki_content:
+        full = parse_bool(data.get('full', False))
+        embedding_svc = wiki_registry.embedding_service(wiki)
+        if full:
+            print("Limpando bases de dados...")
+            session.query(WikiChunk).delete()
+            session.query(WikiTitleToken).delete()
+            session.query(WikiDocument).delete()
+            # Sem os documentos, o estado de sincronização também recomeça do zero
+            session.query(WikiPageRevision).delete()
+            session.commit()
+            embedding_svc.clear_vectordb()
+
+        known_revisions = {state.page_id: state.rev_id for state in session.query(WikiPageRevision).all()}
+        extraction = extractor.extract_changed_content(known_revisions)
+        if not extraction['total_pages']:
             return jsonify({'error': 'Nenhum conteúdo encontrado na Wiki'}), 404
+        wiki_content = extraction['pages']
         
         print("\n--- PROCESSANDO E INDEXANDO PÁGINAS INDIVIDUALMENTE ---")
         processed_docs = 0
@@ -60,58 +169,91 @@ def extract_wiki_content():
         for i, content in enumerate(wiki_content, 1):
             page_title = content.get('title', 'Título Desconhecido')
             print(f"\n({i}/{len(wiki_content)}) Processando página: '{page_title}'") 
+            new_document_id, new_vector_ids = None, []
             
-            if content and content.get('content', '').strip():
-                try:
-                    
+            try:
+                # O documento anterior é procurado pelo título registrado na última sincronização
+                # (a página pode ter sido renomeada) e pelo título atual
+                titles = {page_title}
+                state = None
+                if content.get('page_id') is not None and content.get('rev_id') is not None:
+                    state = session.get(WikiPageRevision, content['page_id'])
+                    if state is None:
+                        state = WikiPageRevision(page_id=content['page_id'])
+                        session.add(state)
+                    else:
+                        titles.add(state.title)
+                    state.title = page_title
+                    state.rev_id = content['rev_id']
+                    state.source = 'api'
+
+                # Vetores dos documentos substituídos, apagados do ChromaDB só após o commit
+                replaced = []
+                for existing in session.query(WikiDocument).filter(WikiDocument.title.in_(titles)).all():
+                    replaced.append((existing.id, embedding_svc.document_vector_ids(existing.id)))
+                    session.delete(existing)
+                session.flush()
+
+                chunks = []
+                if content.get('content', '').strip():
                     doc = WikiDocument(
                         title=content['title'],
                         content=content['content'],
                         url=content['url']
                     )
-                    db.session.add(doc)
-                    db.session.flush()
+                    index_document_title(doc)
+                    session.add(doc)
+                    session.flush()
+                    new_document_id = doc.id
                     
                     chunks = embedding_svc.chunk_text(content['content'])
+                    for chunk_index, chunk_text in enumerate(chunks):
+                        chunk = WikiChunk(
+                            document_id=doc.id,
+                            chunk_text=chunk_text,
+                            chunk_index=chunk_index
+                        )
+                        session.add(chunk)
                     
                     if chunks:
-                        embedding_svc.add_document_to_vectordb(
+                        new_vector_ids = embedding_svc.add_document_to_vectordb(
                             doc.id, content['title'], chunks
                         )
-        
-                    if chunks:
-                        for chunk_index, chunk_text in enumerate(chunks):
-                            chunk = WikiChunk(
-                                document_id=doc.id,
-                                chunk_text=chunk_text,
-                                chunk_index=chunk_index
-                            )
-                            db.session.add(chunk)
-                        total_chunks += len(chunks)
-                    
+                else:
+                    print(f"  ⚠️ AVISO: Página '{page_title}' sem conteúdo após a limpeza; documento anterior removido.")
+
+                session.commit()
+                for document_id, old_vector_ids in replaced:
+                    embedding_svc.delete_document_from_vectordb(document_id, old_vector_ids)
+
+                if chunks:
+                    total_chunks += len(chunks)
                     processed_docs += 1
                     print(f"  ✅ SUCESSO: Página '{page_title}' processada.")
 
-                except Exception as e:
-                    print(f"  ❌ ERRO: Ocorreu um erro ao processar a página '{page_title}': {e}")
-                    import traceback
-                    traceback.print_exc()
-                    db.session.rollback() # Desfaz qualquer alteração desta página no banco
-
-            else:
-                print(f"  ⚠️ AVISO: Página '{page_title}' ignorada (conteúdo vazio).")
-        
-        print("\nCommit final ao banco de dados...")
-        db.session.commit()
+            except Exception as e:
+                print(f"  ❌ ERRO: Ocorreu um erro ao processar a página '{page_title}': {e}")
+                import traceback
+                traceback.print_exc()
+                session.rollback() # Desfaz qualquer alteração desta página no banco
+                if new_vector_ids:
+                    # O documento não foi gravado, então os seus vetores também saem
+                    embedding_svc.delete_document_from_vectordb(new_document_id, new_vector_ids)
         
         print("\n--- PROCESSO CONCLUÍDO ---")
         return jsonify({
             'message': 'Conteúdo extraído e processado com sucesso',
             'documents_processed': processed_docs,
             'total_chunks_created': total_chunks,
-            'total_pages_found': len(wiki_content)
+            'total_pages_found': extraction['total_pages'],
+            'pages_unchanged': extraction['unchanged'],
+            'pages_failed': extraction['failed']
         })
     
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -120,6 +262,9 @@ def extract_wiki_content():
 def ask_question():
     """
     Responde uma pergunta baseada na base de conhecimento, usando busca híbrida.
+
+    `wiki` (nome, lista de nomes ou "all") escolhe em quais Wikis buscar; com várias,
+    as buscas rodam em paralelo e os resultados são unidos pela pontuação.
     """
     try:
         data = request.get_json()
@@ -128,13 +273,13 @@ def ask_question():
         if not question:
             return jsonify({'error': 'Pergunta é obrigária'}), 400
         
-        keyword = None
-        match = re.search(r'(\d{3,})', question)
-        if match:
-            keyword = match.group(1)
-            
-        embedding_svc = get_embedding_service()
-        relevant_chunks = embedding_svc.search_similar_chunks(question, n_results=5, keyword=keyword)
+        wikis = wiki_registry.resolve(data.get('wiki'))
+        embedding_svc = wiki_registry.embedding_service(wikis[0])
+        keyword = embedding_svc.detect_keyword(question)
+        question_embedding = embedding_svc.encode_query(question)
+        relevant_chunks = wiki_registry.search(
+            wikis, question, n_results=5, keyword=keyword, query_embedding=question_embedding
+        )
         
         if not relevant_chunks:
              return jsonify({
@@ -145,48 +290,131 @@ def ask_question():
                  'context_chunks_used': 0 
              })
 
+        # Perguntas quase idênticas que recuperaram os mesmos documentos (na mesma versão) reutilizam a resposta
+        document_ids = answer_cache_keys(relevant_chunks)
+        cached_response = answer_cache.lookup(question_embedding, document_ids)
+        if cached_response:
+            return jsonify({'question': question, **cached_response, 'cached': True})
+
         response = qa_service.generate_answer(question, relevant_chunks)
         
-        # --- INÍCIO DA CORREÇÃO ---
+        fontes_com_links = sources_with_links(response.get('sources', []))
 
-        # 1. Pega a lista de DICIONÁRIOS de fontes que o seu serviço de QA retornou.
-        sources_from_qa = response.get('sources', [])
-        
-        fontes_com_links = []
-        if sources_from_qa:
-            # 2. (A CORREÇÃO ESTÁ AQUI) Extrai APENAS OS TÍTULOS para uma nova lista de strings.
-            titles_for_query = [source['title'] for source in sources_from_qa]
-            
-            # 3. Usa a lista de strings (titles_for_query) na consulta ao banco.
-            documentos = db.session.query(WikiDocument).filter(WikiDocument.title.in_(titles_for_query)).all()
-            
-            # 4. Cria o mapa de "título -> url".
-            url_map = {doc.title: doc.url for doc in documentos}
-            
-            # 5. Monta a lista final para o frontend, iterando sobre a lista original de dicionários.
-            for source_info in sources_from_qa:
-                title = source_info['title']
-                fontes_com_links.append({
-                    'title': title,
-                    'url': url_map.get(title, '#')
-                })
-        
-        # --- FIM DA CORREÇÃO ---
-        
-        return jsonify({
-            'question': question,
+        answer_payload = {
             'answer': response['answer'],
             'confidence': response['confidence'],
             'sources': fontes_com_links,
-            'context_chunks_used': len(relevant_chunks) 
-        })
+            'context_chunks_used': len(relevant_chunks)
+        }
+        # Falhas do Gemini não vão para o cache
+        if not response.get('error'):
+            answer_cache.store(question_embedding, document_ids, answer_payload)
+
+        return jsonify({'question': question, **answer_payload, 'cached': False})
         
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except EncodeQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"ERRO NA ROTA /ask: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'Erro ao processar pergunta: {str(e)}'}), 500
     
+@wiki_bp.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    """
+    Responde várias perguntas de uma vez: todas são codificadas num único lote e as
+    buscas rodam em paralelo. Útil para comparar configurações de busca.
+
+    Body JSON:
+    {
+        "questions": ["Rejeição 528", "como homologar boleto sicredi"],
+        "wiki": "suporte",
+        "skip_llm": false,
+        "config": {"n_results": 5, "n_candidates": 100, "keyword_bonus": 1, "all_keywords_bonus": 10}
+    }
+    """
+    try:
+        data = request.get_json()
+        questions = data.get('questions')
+        skip_llm = parse_bool(data.get('skip_llm', False))
+        config = data.get('config') or {}
+
+        if not questions or not isinstance(questions, list):
+            return jsonify({'error': 'questions deve ser uma lista não vazia'}), 400
+        if not all(isinstance(question, str) and question.strip() for question in questions):
+            return jsonify({'error': 'Cada item de questions deve ser um texto não vazio'}), 400
+        if len(questions) > MAX_BATCH_QUESTIONS:
+            return jsonify({'error': f'No máximo {MAX_BATCH_QUESTIONS} perguntas por lote'}), 400
+        if not isinstance(config, dict):
+            return jsonify({'error': 'config deve ser um objeto'}), 400
+        unknown = set(config) - set(DEFAULT_RETRIEVAL_CONFIG)
+        if unknown:
+            return jsonify({'error': f'Parâmetros de busca desconhecidos: {sorted(unknown)}'}), 400
+
+        search_config = {}
+        for name, value in config.items():
+            value_type, lower, upper = RETRIEVAL_CONFIG_LIMITS[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return jsonify({'error': f'{name} deve ser um número'}), 400
+            search_config[name] = min(max(value_type(value), lower), upper)
+
+        wiki = wiki_registry.get(data.get('wiki'))
+        embedding_svc = wiki_registry.embedding_service(wiki)
+        batch = retrieve_batch(embedding_svc, questions, search_config)
+
+        def answer(item):
+            question, chunks = item
+            if skip_llm or not chunks:
+                return None, 0.0
+            started = time.perf_counter()
+            response = qa_service.generate_answer(question, chunks)
+            return response, (time.perf_counter() - started) * 1000
+
+        llm_results = [(None, 0.0)] * len(questions)
+        if not skip_llm:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                llm_results = list(executor.map(answer, zip(questions, batch['chunks'])))
+
+        results = []
+        for i, question in enumerate(questions):
+            chunks = batch['chunks'][i]
+            response, llm_ms = llm_results[i]
+            result = {
+                'question': question,
+                'sources': sources_with_links([{'title': title, 'wiki': wiki.name} for title in ranked_titles(chunks)]),
+                'context_chunks_used': len(chunks),
+                'timings': {'retrieval_ms': round(batch['retrieval_ms'][i], 2)}
+            }
+            if response:
+                result['answer'] = response['answer']
+                result['confidence'] = response['confidence']
+                result['timings']['llm_ms'] = round(llm_ms, 2)
+            results.append(result)
+
+        return jsonify({
+            'results': results,
+            'timings': {
+                'encode_ms': round(batch['encode_ms'], 2),
+                'retrieval': latency_summary(batch['retrieval_ms']),
+                'llm': latency_summary([ms for response, ms in llm_results if response])
+            }
+        })
+
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"ERRO NA ROTA /ask/batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Erro ao processar perguntas: {str(e)}'}), 500
+
 @wiki_bp.route('/search', methods=['POST'])
 def search_content():
     """
@@ -195,55 +423,139 @@ def search_content():
     Body JSON:
     {
         "query": "VPN conexão",
-        "limit": 5
+        "limit": 5,
+        "offset": 0,
+        "full_text": false,
+        "wiki": ["suporte", "dev"]
     }
+
+    Por padrão cada resultado traz apenas um trecho curto com os termos destacados;
+    `full_text: true` devolve o chunk completo. A paginação cobre os SEARCH_RERANK_POOL
+    melhores resultados; `next_offset` é None no fim desse conjunto.
     """
     try:
         data = request.get_json()
         query = data.get('query')
-        limit = data.get('limit', 50)
         
         if not query:
             return jsonify({'error': 'Query é obrigatória'}), 400
-        
-        # Buscar chunks relevantes
-        embedding_svc = get_embedding_service()
-        relevant_chunks = embedding_svc.search_similar_chunks(query, n_results=50)
-        
+
+        try:
+            limit = min(max(int(data.get('limit', 5)), 1), MAX_SEARCH_LIMIT)
+            offset = max(int(data.get('offset', 0)), 0)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit e offset devem ser inteiros'}), 400
+        full_text = parse_bool(data.get('full_text', False))
+
+        # O conjunto reordenado tem sempre SEARCH_RERANK_POOL vizinhos e cada página é uma
+        # fatia dele; páginas além do fim do conjunto voltam vazias
+        limit = max(min(limit, SEARCH_RERANK_POOL - offset), 0)
+        wikis = wiki_registry.resolve(data.get('wiki'))
+        embedding_svc = wiki_registry.embedding_service(wikis[0])
+        relevant_chunks = []
+        if limit:
+            relevant_chunks = wiki_registry.search(
+                wikis, query, n_results=limit, offset=offset, n_candidates=SEARCH_RERANK_POOL
+            )
+
+        results = []
+        for chunk in relevant_chunks:
+            result = {
+                'metadata': chunk['metadata'],
+                'similarity_score': chunk['similarity_score'],
+                'snippet': embedding_svc.build_snippet(chunk['content'], query)
+            }
+            if full_text:
+                result['content'] = chunk['content']
+            results.append(result)
+
+        has_more = bool(limit) and len(results) == limit and offset + limit < SEARCH_RERANK_POOL
         return jsonify({
             'query': query,
-            'results': relevant_chunks
+            'limit': limit,
+            'offset': offset,
+            'next_offset': offset + limit if has_more else None,
+            'results': results
         })
         
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except EncodeQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': f'Erro ao buscar conteúdo: {str(e)}'}), 500
 
 @wiki_bp.route('/status', methods=['GET'])
 def get_status():
-    """Retorna status da base de conhecimento"""
+    """Retorna status da base de conhecimento (da Wiki do parâmetro `wiki`, ou da padrão)"""
     try:
-        doc_count = WikiDocument.query.count()
-        chunk_count = WikiChunk.query.count()
+        wiki = wiki_registry.get(request.args.get('wiki'))
+        doc_count = wiki.session.query(WikiDocument).count()
+        chunk_count = wiki.session.query(WikiChunk).count()
         
-        return jsonify({
+        status = {
+            'wiki': wiki.name,
             'documents': doc_count,
             'chunks': chunk_count,
             'status': 'ready' if doc_count > 0 else 'empty'
-        })
+        }
+        # Métricas do micro-batching de queries, se o modelo já foi carregado
+        if wiki_registry.shared_service is not None:
+            status['query_encoder'] = wiki_registry.shared_service.query_batcher.stats()
+        status['answer_cache'] = answer_cache.stats()
+
+        return jsonify(status)
         
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Erro ao obter status: {str(e)}'}), 500
 
 @wiki_bp.route('/documents', methods=['GET'])
 def list_documents():
-    """Lista todos os documentos na base de conhecimento"""
+    """
+    Lista os documentos da base de conhecimento com paginação por cursor (keyset).
+
+    Query params:
+        limit: quantidade de documentos por página (máx. MAX_DOCUMENTS_PAGE)
+        after_id: id do último documento da página anterior (`next_cursor`)
+        wiki: Wiki a listar (padrão: a Wiki padrão)
+
+    Apenas id/título/url/created_at são carregados; o `content` fica adiado.
+    """
     try:
-        documents = WikiDocument.query.all()
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), MAX_DOCUMENTS_PAGE)
+            after_id = request.args.get('after_id')
+            after_id = int(after_id) if after_id is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit e after_id devem ser inteiros'}), 400
+
+        wiki = wiki_registry.get(request.args.get('wiki'))
+        query = wiki.session.query(WikiDocument).options(
+            load_only(WikiDocument.id, WikiDocument.title, WikiDocument.url, WikiDocument.created_at),
+            defer(WikiDocument.content)
+        ).order_by(WikiDocument.id)
+        if after_id is not None:
+            query = query.filter(WikiDocument.id > after_id)
+
+        # Busca um item extra só para saber se existe próxima página
+        documents = query.limit(limit + 1).all()
+        has_more = len(documents) > limit
+        documents = documents[:limit]
         
         return jsonify({
-            'documents': [doc.to_dict() for doc in documents]
+            'documents': [doc.to_dict() for doc in documents],
+            'next_cursor': documents[-1].id if has_more else None
         })
         
+    except UnknownWikiError as e:
+        return jsonify({'error': str(e)}), 404
+    except WikiSelectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Erro ao listar documentos: {str(e)}'}), 500
-
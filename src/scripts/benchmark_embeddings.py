@@ -0,0 +1,78 @@
+"""
+Benchmark dos backends de inferência do modelo de embeddings.
+
+Compara o throughput de encode (ingestão) e a latência de uma única query entre o
+PyTorch fp32 e os backends ONNX, e verifica a concordância de cosseno com o PyTorch.
+
+Uso:
+    python -m src.scripts.benchmark_embeddings --backends torch onnx-int8 --threads 4
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.embedding_service import (
+    AGREEMENT_SAMPLE_TEXTS, BACKENDS, DEFAULT_MODEL_NAME, backend_agreement, load_embedding_model
+)
+
+SAMPLE_QUERY = "Como resolver a rejeição 528 na emissão da nota?"
+
+
+def build_corpus(size: int):
+    """Monta um corpus sintético com o tamanho típico dos chunks enriquecidos."""
+    base = AGREEMENT_SAMPLE_TEXTS
+    return [f"{base[i % len(base)]} Parágrafo {i}. " * 6 for i in range(size)]
+
+
+def benchmark_backend(model, corpus, batch_size: int, query_runs: int):
+    # Aquecimento (primeira chamada inclui alocações e otimizações do grafo)
+    model.encode(corpus[:batch_size], batch_size=batch_size)
+    model.encode([SAMPLE_QUERY])
+
+    start = time.perf_counter()
+    model.encode(corpus, batch_size=batch_size)
+    encode_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(query_runs):
+        start = time.perf_counter()
+        model.encode([SAMPLE_QUERY])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    return {
+        'throughput': len(corpus) / encode_seconds,
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': latencies[math.ceil(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--threads', type=int, default=None, help='Threads intra-op (padrão: do runtime)')
+    parser.add_argument('--corpus-size', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--query-runs', type=int, default=100)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus_size)
+    reference = load_embedding_model(args.model, 'torch', args.threads)
+
+    print(f"{'backend':<12}{'chunks/s':>12}{'query p50 ms':>15}{'query p95 ms':>15}{'cos mín':>10}")
+    for backend in args.backends:
+        model = reference if backend == 'torch' else load_embedding_model(args.model, backend, args.threads)
+        result = benchmark_backend(model, corpus, args.batch_size, args.query_runs)
+        agreement = backend_agreement(model, reference)
+        print(f"{backend:<12}{result['throughput']:>12.1f}{result['p50_ms']:>15.2f}"
+              f"{result['p95_ms']:>15.2f}{agreement['min_cosine']:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
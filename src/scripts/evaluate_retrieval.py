@@ -0,0 +1,77 @@
+"""
+Avaliação offline da busca: recall@k, MRR e latência por etapa para uma ou mais
+configurações de busca, sem chamar o LLM.
+
+O arquivo de perguntas é JSONL, uma por linha:
+    {"question": "Rejeição 528", "expected_titles": ["Rejeição 528"]}
+
+Cada combinação dos valores passados gera uma configuração avaliada.
+
+Uso:
+    python -m src.scripts.evaluate_retrieval perguntas.jsonl --n-results 5 10 --n-candidates 50 100
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.wiki_registry import WikiRegistry
+from src.services.retrieval_eval import DEFAULT_RETRIEVAL_CONFIG, evaluate_retrieval
+
+
+def load_dataset(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dataset', help='Arquivo JSONL com question / expected_titles')
+    parser.add_argument('--n-results', type=int, nargs='+', default=[DEFAULT_RETRIEVAL_CONFIG['n_results']])
+    parser.add_argument('--n-candidates', type=int, nargs='+', default=[DEFAULT_RETRIEVAL_CONFIG['n_candidates']])
+    parser.add_argument('--keyword-bonus', type=float, nargs='+', default=[DEFAULT_RETRIEVAL_CONFIG['keyword_bonus']])
+    parser.add_argument('--all-keywords-bonus', type=float, nargs='+',
+                        default=[DEFAULT_RETRIEVAL_CONFIG['all_keywords_bonus']])
+    parser.add_argument('--wiki', default=None, help='Wiki do registro a avaliar (padrão: a Wiki padrão)')
+    parser.add_argument('--ks', type=int, nargs='+', default=[1, 3, 5])
+    parser.add_argument('--workers', type=int, default=8, help='Buscas em paralelo')
+    parser.add_argument('--json', action='store_true', help='Imprime o relatório completo em JSON')
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    registry = WikiRegistry.from_env(os.path.join(os.path.dirname(__file__), '..', '..', 'database'))
+    embedding_svc = registry.embedding_service(registry.get(args.wiki))
+
+    reports = []
+    for n_results, n_candidates, keyword_bonus, all_keywords_bonus in itertools.product(
+            args.n_results, args.n_candidates, args.keyword_bonus, args.all_keywords_bonus):
+        config = {
+            'n_results': n_results,
+            'n_candidates': n_candidates,
+            'keyword_bonus': keyword_bonus,
+            'all_keywords_bonus': all_keywords_bonus,
+        }
+        reports.append(evaluate_retrieval(embedding_svc, dataset, config, ks=args.ks, max_workers=args.workers))
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return
+
+    recall_columns = [f'recall@{k}' for k in args.ks]
+    header = ['n_res', 'n_cand', 'kw', 'all_kw'] + recall_columns + ['mrr', 'enc ms/q', 'ret p50', 'ret p95']
+    print(f"{len(dataset)} perguntas")
+    print(''.join(f"{column:>10}" for column in header))
+    for report in reports:
+        config = report['config']
+        row = [config['n_results'], config['n_candidates'], config['keyword_bonus'], config['all_keywords_bonus']]
+        row += [report[column] for column in recall_columns]
+        row += [report['mrr'], report['encode_ms_per_question'],
+                report['retrieval']['p50_ms'], report['retrieval']['p95_ms']]
+        print(''.join(f"{value:>10}" for value in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Indexa um dump XML do MediaWiki (Special:Export / dumpBackup.php) sem acessar a Wiki.
+
+Uso:
+    python -m src.scripts.ingest_dump wiki-20250101.xml.bz2 [--clear] [--batch-size 256]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.main import app
+from src.routes.wiki import wiki_registry
+from src.services.dump_ingest import ingest_dump
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='Dump .xml, .xml.bz2 ou .xml.gz')
+    parser.add_argument('--wiki', default=None, help='Wiki de destino no registro (padrão: a Wiki padrão)')
+    parser.add_argument('--base-url', default=None, help='URL base da Wiki (padrão: a do registro ou <siteinfo> do dump)')
+    parser.add_argument('--namespaces', type=int, nargs='+', default=[0])
+    parser.add_argument('--batch-size', type=int, default=256, help='Chunks por lote de embeddings')
+    parser.add_argument('--clear', action='store_true', help='Apaga a base antes de indexar')
+    args = parser.parse_args()
+
+    with app.app_context():
+        wiki = wiki_registry.get(args.wiki)
+        stats = ingest_dump(
+            args.path, wiki_registry.embedding_service(wiki), base_url=args.base_url or wiki.url,
+            namespaces=args.namespaces, batch_size=args.batch_size, clear=args.clear, session=wiki.session
+        )
+
+    print("\n--- INGESTÃO DO DUMP CONCLUÍDA ---")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
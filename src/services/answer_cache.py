@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas para perguntas quase idênticas ("como homologar boleto sicredi" vs
+    "homologação boleto Sicredi").
+
+    Guarda o embedding normalizado de cada pergunta respondida num pequeno índice em memória.
+    Uma nova pergunta reutiliza a resposta quando a similaridade de cosseno passa de
+    `threshold` E a busca recuperou exatamente o mesmo conjunto de documentos. As chaves dos
+    documentos incluem a sua versão, para que uma re-ingestão feita em outro processo também
+    torne as respostas antigas inválidas.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000, ttl_seconds: float = 86400):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._entries: List[Dict] = []
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question_embedding, document_ids) -> Optional[Dict]:
+        """Retorna a resposta em cache mais similar que atenda ao limiar e ao conjunto de documentos."""
+        document_ids = frozenset(document_ids)
+        vector = self._normalize(question_embedding)
+        now = time.time()
+
+        with self._lock:
+            if self._entries:
+                similarities = self._vectors @ vector
+                for index in np.argsort(-similarities):
+                    if similarities[index] < self.threshold:
+                        break
+                    entry = self._entries[index]
+                    if entry['document_ids'] == document_ids and now - entry['created_at'] <= self.ttl_seconds:
+                        entry['last_used'] = now
+                        self.hits += 1
+                        return entry['response']
+            self.misses += 1
+        return None
+
+    def store(self, question_embedding, document_ids, response: Dict):
+        """Adiciona uma resposta ao cache, descartando a menos usada se estiver cheio."""
+        vector = self._normalize(question_embedding)
+        now = time.time()
+        entry = {'document_ids': frozenset(document_ids), 'response': response,
+                 'created_at': now, 'last_used': now}
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]['last_used'])
+                self._remove([oldest])
+            if not self._entries:
+                self._vectors = vector[np.newaxis, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._entries.append(entry)
+
+    def _remove(self, indexes: List[int]):
+        keep = [i for i in range(len(self._entries)) if i not in set(indexes)]
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else np.empty((0, 0), dtype=np.float32)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        """Remove as respostas em que algum documento usado satisfaz `predicate`."""
+        with self._lock:
+            stale = [i for i, entry in enumerate(self._entries)
+                     if any(predicate(key) for key in entry['document_ids'])]
+            if stale:
+                self._remove(stale)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,200 @@
+import bz2
+import gzip
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Sequence
+from src.models.wiki import db, WikiDocument, WikiChunk, WikiPageRevision, WikiTitleToken
+from src.services.title_index import index_document_title
+from src.services.wiki_extractor import clean_wikitext
+
+
+class MediaWikiDumpReader:
+    """
+    Lê um dump XML do MediaWiki (Special:Export / dumpBackup.php), opcionalmente
+    comprimido em .bz2 ou .gz, de forma incremental e com memória constante.
+    """
+
+    def __init__(self, path: str, namespaces: Sequence[int] = (0,)):
+        """
+        Args:
+            path: caminho do dump (.xml, .xml.bz2 ou .xml.gz)
+            namespaces: namespaces a ler (por padrão apenas o principal, como no crawl da API)
+        """
+        self.path = path
+        self.namespaces = set(namespaces)
+        self.site_base = None  # <siteinfo><base>, ex: https://wiki.empresa.com/index.php/Página_principal
+
+    def _open(self):
+        if self.path.endswith('.bz2'):
+            return bz2.open(self.path, 'rb')
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    @staticmethod
+    def _local_name(tag: str) -> str:
+        # Remove o namespace XML ("{http://www.mediawiki.org/xml/export-0.10/}page" -> "page")
+        return tag.rsplit('}', 1)[-1]
+
+    def iter_pages(self) -> Iterator[Dict]:
+        """
+        Gera um dicionário por <page> com page_id, title, namespace, redirect, rev_id e text
+        (a última revisão presente no dump).
+        """
+        with self._open() as stream:
+            context = ET.iterparse(stream, events=('start', 'end'))
+            _, root = next(context)
+            xmlns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+            revision = None
+
+            for event, elem in context:
+                if event != 'end':
+                    continue
+                name = self._local_name(elem.tag)
+
+                if name == 'base' and self.site_base is None:
+                    self.site_base = (elem.text or '').strip()
+                elif name == 'revision':
+                    # Em dumps com histórico completo ficamos só com a última revisão
+                    revision = {
+                        'rev_id': int(elem.findtext(f'{xmlns}id')),
+                        'text': elem.findtext(f'{xmlns}text') or ''
+                    }
+                    elem.clear()
+                elif name == 'page':
+                    namespace = int(elem.findtext(f'{xmlns}ns') or 0)
+                    if revision and namespace in self.namespaces:
+                        yield {
+                            'page_id': int(elem.findtext(f'{xmlns}id')),
+                            'title': elem.findtext(f'{xmlns}title'),
+                            'namespace': namespace,
+                            'redirect': elem.find(f'{xmlns}redirect') is not None,
+                            'rev_id': revision['rev_id'],
+                            'text': revision['text']
+                        }
+                    revision = None
+                    # Descarta a página já processada para manter a memória constante
+                    elem.clear()
+                    root.clear()
+
+    def wiki_base_url(self) -> Optional[str]:
+        """Deriva a URL base da Wiki a partir do <siteinfo><base> do dump."""
+        if not self.site_base:
+            return None
+        return self.site_base.split('/index.php')[0].rstrip('/')
+
+
+def ingest_dump(path: str, embedding_svc, base_url: Optional[str] = None, namespaces: Sequence[int] = (0,),
+                batch_size: int = 256, clear: bool = False, session=None) -> Dict:
+    """
+    Indexa um dump XML página a página: limpeza do wikitext, chunking e embeddings em lotes
+    de até `batch_size` chunks. Deve ser chamada dentro de um app context do Flask.
+
+    Páginas cuja revisão já consta em WikiPageRevision são ignoradas; páginas com revisão nova
+    substituem o documento anterior, inclusive quando foram renomeadas. Os vetores antigos só
+    saem do ChromaDB depois do commit do lote. A revisão de cada página lida fica registrada,
+    servindo de ponto de partida para a sincronização incremental.
+
+    `session` é a sessão do banco da Wiki de destino (por padrão a da aplicação) e `base_url`
+    a URL dessa Wiki no registro; sem ela, a URL vem do <siteinfo><base> do dump.
+    """
+    session = session or db.session
+    reader = MediaWikiDumpReader(path, namespaces)
+    base_url = (base_url or '').rstrip('/')
+    stats = {'pages_read': 0, 'documents_processed': 0, 'total_chunks_created': 0,
+             'unchanged': 0, 'skipped': 0}
+
+    if clear:
+        print("Limpando bases de dados...")
+        session.query(WikiChunk).delete()
+        session.query(WikiTitleToken).delete()
+        session.query(WikiDocument).delete()
+        session.query(WikiPageRevision).delete()
+        session.commit()
+        embedding_svc.clear_vectordb()
+
+    pending = []
+    pending_chunks = 0
+    # Vetores dos documentos substituídos: (document_id, ids no ChromaDB), apagados só após o commit
+    replaced = []
+
+    def flush_batch():
+        nonlocal pending_chunks
+        vector_ids = embedding_svc.add_documents_to_vectordb(pending)
+        try:
+            session.commit()
+        except Exception:
+            # Sem o commit os documentos novos não existem; os seus vetores também saem
+            session.rollback()
+            start = 0
+            for document_id, _, chunks in pending:
+                embedding_svc.delete_document_from_vectordb(document_id, vector_ids[start:start + len(chunks)])
+                start += len(chunks)
+            raise
+        for document_id, old_vector_ids in replaced:
+            embedding_svc.delete_document_from_vectordb(document_id, old_vector_ids)
+        # Libera os objetos já gravados para que a sessão não cresça com o dump
+        session.expunge_all()
+        pending.clear()
+        replaced.clear()
+        pending_chunks = 0
+
+    for page in reader.iter_pages():
+        # Grava em lotes de chunks (e periodicamente, mesmo se as páginas não mudaram)
+        if pending_chunks >= batch_size or (stats['pages_read'] and stats['pages_read'] % 1000 == 0):
+            flush_batch()
+            print(f"  {stats['pages_read']} páginas lidas, {stats['documents_processed']} indexadas...")
+
+        stats['pages_read'] += 1
+        if not base_url:
+            base_url = reader.wiki_base_url() or ''
+
+        state = session.get(WikiPageRevision, page['page_id'])
+        if state and state.rev_id == page['rev_id']:
+            stats['unchanged'] += 1
+            continue
+        # O documento anterior é procurado pelo título já registrado (a página pode ter sido
+        # renomeada) e pelo título atual
+        titles = {page['title']}
+        if state is None:
+            state = WikiPageRevision(page_id=page['page_id'])
+            session.add(state)
+        else:
+            titles.add(state.title)
+        state.title = page['title']
+        state.rev_id = page['rev_id']
+        state.source = 'dump'
+
+        content = clean_wikitext(page['text']) if not page['redirect'] else ''
+        existing_documents = session.query(WikiDocument).filter(WikiDocument.title.in_(titles)).all()
+        for existing in existing_documents:
+            replaced.append((existing.id, embedding_svc.document_vector_ids(existing.id)))
+            # Documento do próprio lote (ainda não enviado ao ChromaDB)
+            pending[:] = [item for item in pending if item[0] != existing.id]
+            session.delete(existing)
+        if existing_documents:
+            session.flush()
+
+        if not content.strip():
+            stats['skipped'] += 1
+            continue
+
+        doc = WikiDocument(
+            title=page['title'],
+            content=content,
+            url=f"{base_url}/index.php?title={page['title'].replace(' ', '_')}"
+        )
+        index_document_title(doc)
+        session.add(doc)
+        session.flush()
+
+        chunks = embedding_svc.chunk_text(content)
+        for chunk_index, chunk_text in enumerate(chunks):
+            session.add(WikiChunk(document_id=doc.id, chunk_text=chunk_text, chunk_index=chunk_index))
+
+        pending.append((doc.id, page['title'], chunks))
+        pending_chunks += len(chunks)
+        stats['documents_processed'] += 1
+        stats['total_chunks_created'] += len(chunks)
+
+    flush_batch()
+    return stats
@@ -1,30 +1,167 @@
+import html
+import os
 import re
 import uuid
-from typing import List
+from typing import List, Dict, Optional
+import numpy as np
 from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.config import Settings
 from thefuzz import fuzz
+from src.services.query_batcher import QueryEncodeBatcher
+from src.services.title_index import TitleIndex, normalize_title
+
+DEFAULT_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_COLLECTION_NAME = "wiki_knowledge_base"
+
+# Backends de inferência suportados para o modelo de embeddings
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Textos usados para verificar se um backend gera vetores compatíveis com a coleção existente
+AGREEMENT_SAMPLE_TEXTS = [
+    "Título da Página: Rejeição 528\n\nConteúdo: Valor do ICMS difere do produto BC e Alíquota.",
+    "Como homologar boleto do Sicredi?",
+    "Configuração da VPN para acesso remoto ao servidor.",
+    "Erro ao emitir NFC-e: certificado digital vencido.",
+]
+
+
+def load_embedding_model(model_name: str = DEFAULT_MODEL_NAME, backend: str = "torch",
+                         num_threads: Optional[int] = None,
+                         quantization: str = "avx2") -> SentenceTransformer:
+    """
+    Carrega o SentenceTransformer no backend de inferência escolhido.
+
+    - "torch": caminho padrão PyTorch fp32.
+    - "onnx": ONNX Runtime fp32.
+    - "onnx-int8": ONNX Runtime com quantização dinâmica int8. O modelo quantizado é
+      exportado uma única vez para EMBEDDING_ONNX_DIR e reutilizado nas próximas cargas.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embeddings inválido: '{backend}'. Use um de {BACKENDS}.")
+
+    if backend == "torch":
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(model_name)
+
+    import onnxruntime as ort
+    session_options = ort.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    onnx_dir = os.path.join(
+        os.getenv("EMBEDDING_ONNX_DIR", "./onnx_models"),
+        model_name.replace("/", "__")
+    )
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if not os.path.exists(os.path.join(onnx_dir, file_name)):
+        print(f"Exportando modelo ONNX int8 ({quantization}) para {onnx_dir}...")
+        fp32_model = SentenceTransformer(model_name, backend="onnx", model_kwargs={"provider": "CPUExecutionProvider"})
+        fp32_model.save_pretrained(onnx_dir)
+        export_dynamic_quantized_onnx_model(fp32_model, quantization, onnx_dir)
+
+    model_kwargs["file_name"] = file_name
+    return SentenceTransformer(onnx_dir, backend="onnx", model_kwargs=model_kwargs)
+
+
+def backend_agreement(model: SentenceTransformer, reference: SentenceTransformer,
+                      texts: Optional[List[str]] = None) -> Dict:
+    """
+    Compara os embeddings de dois modelos sobre os mesmos textos e devolve a
+    similaridade de cosseno mínima e média entre os pares de vetores.
+    """
+    texts = texts or AGREEMENT_SAMPLE_TEXTS
+    a = model.encode(texts, normalize_embeddings=True)
+    b = reference.encode(texts, normalize_embeddings=True)
+    cosines = np.sum(np.asarray(a) * np.asarray(b), axis=1)
+    return {'min_cosine': float(cosines.min()), 'mean_cosine': float(cosines.mean())}
+
 
 class EmbeddingService:
     """Serviço responsável por gerar embeddings e gerenciar o banco vetorial com ChromaDB"""
 
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None,
+                 num_threads: Optional[int] = None, collection_name: str = DEFAULT_COLLECTION_NAME,
+                 model: Optional[SentenceTransformer] = None, query_batcher: Optional[QueryEncodeBatcher] = None,
+                 chroma_client=None, title_index: Optional[TitleIndex] = None):
         """
         Inicializa o modelo de embeddings e o cliente do ChromaDB.
+
+        O backend de inferência vem de EMBEDDING_BACKEND ("torch", "onnx" ou "onnx-int8")
+        e o número de threads intra-op de EMBEDDING_NUM_THREADS, caso não sejam informados.
+        `model`, `query_batcher` e `chroma_client` reutilizam os de outro serviço (ver with_collection).
+        `title_index` é o índice de títulos gravado na ingestão, usado pela busca por código.
         """
+        self.model_name = model_name
+        self.backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
 
-        self.model = SentenceTransformer(model_name)
+        if model is not None:
+            self.model = model
+        else:
+            if num_threads is None and os.getenv("EMBEDDING_NUM_THREADS"):
+                num_threads = int(os.getenv("EMBEDDING_NUM_THREADS"))
+            self.model = load_embedding_model(
+                model_name, self.backend, num_threads,
+                quantization=os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")
+            )
+            if self.backend != "torch" and os.getenv("EMBEDDING_VALIDATE_BACKEND", "").lower() in ("1", "true"):
+                self.check_backend_agreement()
+
+        # Queries concorrentes são agrupadas e codificadas numa única passada do modelo
+        self.query_batcher = query_batcher or QueryEncodeBatcher(
+            self.generate_embeddings,
+            window_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")),
+            max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32")),
+            max_queue_size=int(os.getenv("EMBEDDING_MAX_QUEUE_SIZE", "256"))
+        )
 
-        self.chroma_client = chromadb.PersistentClient(
+        self.chroma_client = chroma_client or chromadb.PersistentClient(
             path="./chroma_db",
             settings=Settings(anonymized_telemetry=False)
         )
 
+        self.collection_name = collection_name
         self.collection = self.chroma_client.get_or_create_collection(
-            name="wiki_knowledge_base",
+            name=collection_name,
             metadata={"description": "Base de conhecimento da Wiki interna"}
         )
+        self.title_index = title_index
+
+        # Callbacks chamados quando um documento sai da base (None = base inteira limpa)
+        self.document_removed_listeners = []
+
+    def with_collection(self, collection_name: str, title_index: Optional[TitleIndex] = None) -> 'EmbeddingService':
+        """
+        Cria um serviço para outra coleção (ex: outra Wiki) que compartilha o mesmo modelo,
+        o despachante de micro-lotes e o cliente do ChromaDB deste serviço.
+        """
+        return EmbeddingService(
+            self.model_name, self.backend, collection_name=collection_name, model=self.model,
+            query_batcher=self.query_batcher, chroma_client=self.chroma_client, title_index=title_index
+        )
+
+    def check_backend_agreement(self, min_cosine: float = 0.98) -> Dict:
+        """
+        Verifica se o backend atual gera vetores compatíveis com os do PyTorch fp32,
+        que foram usados para indexar a coleção existente.
+        """
+        reference = SentenceTransformer(self.model_name)
+        agreement = backend_agreement(self.model, reference)
+        agreement['ok'] = agreement['min_cosine'] >= min_cosine
+        if agreement['ok']:
+            print(f"Backend '{self.backend}' compatível com PyTorch (cosseno mínimo {agreement['min_cosine']:.4f}).")
+        else:
+            print(f"AVISO: backend '{self.backend}' diverge do PyTorch (cosseno mínimo "
+                  f"{agreement['min_cosine']:.4f} < {min_cosine}). Considere reindexar a coleção.")
+        return agreement
 
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """
@@ -61,29 +198,67 @@ class EmbeddingService:
         """
         return self.model.encode(texts).tolist()
 
+    def encode_query(self, query: str) -> List[float]:
+        """
+        Gera o embedding de uma única query através do despachante de micro-lotes.
+        """
+        return self.query_batcher.encode(query)
+
+    def _title_index_candidates(self, keyword: str) -> Dict[int, str]:
+        """Documentos (id -> título) com o código no título, pelo índice gravado na ingestão."""
+        return self.title_index.documents_with_token(keyword) if self.title_index else {}
+
+    def _content_candidates(self, keyword: str) -> Dict[int, str]:
+        """Documentos (id -> título) cujo conteúdo indexado contém o código."""
+        matches = self.collection.get(where_document={'$contains': keyword}, include=['metadatas'])
+        return {metadata['document_id']: metadata['title'] for metadata in matches['metadatas']}
+
+    def _rank_documents_by_title(self, query: str, keyword: str, candidates: Dict[int, str]) -> Optional[int]:
+        """
+        Escolhe o documento cujo título melhor corresponde à query: similaridade fuzzy sobre
+        os títulos normalizados (calculada uma única vez por documento) + bônus quando o
+        código aparece no título.
+        """
+        query_normalized = normalize_title(query)
+        best_id, best_score = None, None
+        # Ordena para manter o desempate determinístico entre títulos com a mesma pontuação
+        for document_id in sorted(candidates):
+            title_normalized = normalize_title(candidates[document_id])
+            score = fuzz.partial_ratio(query_normalized, title_normalized) + (1000 if keyword in title_normalized else 0)
+            if best_score is None or score > best_score:
+                best_id, best_score = document_id, score
+        return best_id
+
     def add_document_to_vectordb(self, document_id: int, title: str, chunks: List[str]) -> List[str]:
         """
         Armazena os embeddings e metadados dos chunks de um documento na base vetorial.
         O texto de cada chunk é ENRIQUECIDO com o título do documento para melhorar a busca.
         """
-        if not chunks:
-            return []
+        return self.add_documents_to_vectordb([(document_id, title, chunks)])
 
-        enriched_chunks = [f"Título da Página: {title}\n\nConteúdo: {chunk}" for chunk in chunks]
-        embeddings = self.generate_embeddings(enriched_chunks)
-        
+    def add_documents_to_vectordb(self, documents: List[tuple]) -> List[str]:
+        """
+        Versão em lote de add_document_to_vectordb: recebe tuplas (document_id, título, chunks)
+        e gera os embeddings de todos os chunks numa única chamada ao modelo.
+        """
+        enriched_chunks = []
         embedding_ids = []
         metadatas = []
-        for i, chunk in enumerate(chunks):
-            embedding_id = str(uuid.uuid4())
-            embedding_ids.append(embedding_id)
-            metadatas.append({
-                'document_id': document_id,
-                'title': title,
-                'chunk_index': i,
-                'chunk_length': len(chunk)
-            })
+        for document_id, title, chunks in documents:
+            for i, chunk in enumerate(chunks):
+                enriched_chunks.append(f"Título da Página: {title}\n\nConteúdo: {chunk}")
+                embedding_ids.append(str(uuid.uuid4()))
+                metadatas.append({
+                    'document_id': document_id,
+                    'title': title,
+                    'chunk_index': i,
+                    'chunk_length': len(chunk)
+                })
+
+        if not enriched_chunks:
+            return []
 
+        embeddings = self.generate_embeddings(enriched_chunks)
         self.collection.add(
             embeddings=embeddings,
             documents=enriched_chunks,
@@ -92,48 +267,112 @@ class EmbeddingService:
         )
         return embedding_ids
 
+    def document_vector_ids(self, document_id: int) -> List[str]:
+        """Ids no ChromaDB dos chunks de um documento."""
+        return self.collection.get(where={'document_id': document_id}, include=[])['ids']
+
+    def delete_document_from_vectordb(self, document_id: int, vector_ids: Optional[List[str]] = None):
+        """
+        Remove os chunks de um documento da base vetorial.
+
+        Com `vector_ids` remove apenas esses chunks (obtidos com document_vector_ids antes
+        de apagar o documento no banco): o SQLite pode ter reutilizado o id numa página nova.
+        """
+        if vector_ids is None:
+            self.collection.delete(where={'document_id': document_id})
+        elif vector_ids:
+            self.collection.delete(ids=vector_ids)
+        for listener in self.document_removed_listeners:
+            listener(document_id)
+
+    def detect_keyword(self, query: str) -> Optional[str]:
+        """Retorna o primeiro código numérico da query (ex: "Rejeição 528" -> "528"), se houver."""
+        match = re.search(r'(\d{3,})', query)
+        return match.group(1) if match else None
+
     def _extract_keywords(self, query: str) -> List[str]:
         """Extrai palavras-chave de uma query, ignorando palavras muito curtas."""
         return [word for word in re.findall(r'\b\w+\b', query.lower()) if len(word) > 3]
 
-    def search_similar_chunks(self, query: str, n_results: int = 5, keyword: str = None) -> List[dict]:
+    def build_snippet(self, content: str, query: str, width: int = 240) -> str:
+        """
+        Gera um trecho curto do chunk centrado na primeira ocorrência de uma palavra-chave
+        da query, com os termos encontrados destacados em <mark>. O restante do texto
+        é devolvido com o HTML escapado.
+        """
+        # Remove o enriquecimento com o título adicionado na indexação
+        text = re.sub(r'^Título da Página: .*?\n\nConteúdo: ', '', content, count=1, flags=re.DOTALL)
+        text = re.sub(r'\s+', ' ', text).strip()
+
+        # Códigos numéricos (ex: "Rejeição 528") também são destacados
+        keywords = self._extract_keywords(query) + re.findall(r'\b\d{3,}\b', query)
+        text_lower = text.lower()
+        positions = [text_lower.find(k) for k in keywords if k in text_lower]
+        first_match = min(positions) if positions else 0
+
+        start = max(0, first_match - width // 3)
+        end = min(len(text), start + width)
+        snippet = text[start:end]
+        if start > 0:
+            snippet = '…' + snippet
+        if end < len(text):
+            snippet = snippet + '…'
+
+        if not keywords:
+            return html.escape(snippet)
+
+        # O texto da Wiki é escapado antes de receber os <mark>, que são o único HTML do trecho
+        pattern = re.compile('|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)), re.IGNORECASE)
+        parts = []
+        last_end = 0
+        for match in pattern.finditer(snippet):
+            parts.append(html.escape(snippet[last_end:match.start()]))
+            parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+            last_end = match.end()
+        parts.append(html.escape(snippet[last_end:]))
+        return ''.join(parts)
+
+    def search_similar_chunks(self, query: str, n_results: int = 5, keyword: str = None,
+                              offset: int = 0, n_candidates: int = 100,
+                              query_embedding: Optional[List[float]] = None,
+                              keyword_bonus: float = 1, all_keywords_bonus: float = 10) -> List[dict]:
         """
         Busca Híbrida Completa: Usa keyword para busca direta com priorização de título,
         ou uma combinação de semântica + keyword para busca normal.
+
+        `offset` e `n_candidates` permitem paginar a busca semântica: apenas
+        `max(n_candidates, offset + n_results)` vizinhos são pedidos ao ChromaDB.
+        `query_embedding` evita codificar de novo uma query cujo vetor já foi calculado.
+        `keyword_bonus` (por palavra-chave presente) e `all_keywords_bonus` (todas presentes)
+        ajustam a reordenação da busca semântica.
         """
         
         if keyword:
             # --- Bloco para buscas com keyword (Ex: "Rejeição 528") ---
 
             try:
-                all_docs = self.collection.get(include=['documents', 'metadatas'])
-                candidate_chunks = []
-                for i in range(len(all_docs['documents'])):
-                    doc_content = all_docs['documents'][i]
-                    if keyword.lower() in doc_content.lower():
-                        candidate_chunks.append({ 'content': doc_content, 'metadata': all_docs['metadatas'][i] })
-                
-                if not candidate_chunks: return []
-
-                for chunk in candidate_chunks:
-                    title_lower = chunk['metadata']['title'].lower()
-                    fuzzy_score = fuzz.partial_ratio(query.lower(), title_lower)
-                    title_bonus = 1000 if keyword in title_lower else 0
-                    chunk['rank_score'] = fuzzy_score + title_bonus
-
-                candidate_chunks.sort(key=lambda x: x['rank_score'], reverse=True)
-                best_document_id = candidate_chunks[0]['metadata']['document_id']
-                
-                full_document_chunks = []
-                for i in range(len(all_docs['documents'])):
-                    if all_docs['metadatas'][i]['document_id'] == best_document_id:
-                        full_document_chunks.append({
-                            'content': all_docs['documents'][i],
-                            'metadata': all_docs['metadatas'][i],
-                            'similarity_score': 1.0
-                        })
-                full_document_chunks.sort(key=lambda x: x['metadata']['chunk_index'])
-                return full_document_chunks
+                # Caminho rápido: o código aparece no título de alguma página (índice de ingestão,
+                # lido a cada busca). Senão, ou se esse documento não tem vetores, procura as
+                # páginas cujo conteúdo contém o código
+                for find_candidates in (self._title_index_candidates, self._content_candidates):
+                    candidates = find_candidates(keyword)
+                    if not candidates:
+                        continue
+
+                    best_document_id = self._rank_documents_by_title(query, keyword, candidates)
+                    document_chunks = self.collection.get(
+                        where={'document_id': best_document_id}, include=['documents', 'metadatas']
+                    )
+                    if not document_chunks['documents']:
+                        continue
+
+                    full_document_chunks = [
+                        {'content': content, 'metadata': metadata, 'similarity_score': 1.0}
+                        for content, metadata in zip(document_chunks['documents'], document_chunks['metadatas'])
+                    ]
+                    full_document_chunks.sort(key=lambda x: x['metadata']['chunk_index'])
+                    return full_document_chunks[offset:] if offset else full_document_chunks
+                return []
             except Exception as e:
                 print(f"Erro durante a busca com fallback: {e}")
                 return []
@@ -141,11 +380,12 @@ class EmbeddingService:
         else:
             # --- Bloco para buscas SEMÂNTICAS (Ex: "homologar boleto sicredi") ---
             print("Executando busca semântica HÍBRIDA com reordenação por keywords.")
-            query_embedding = self.model.encode([query]).tolist()[0]
+            if query_embedding is None:
+                query_embedding = self.encode_query(query)
             
             results = self.collection.query(
                 query_embeddings=[query_embedding],
-                n_results=100,
+                n_results=max(n_candidates, offset + n_results),
                 include=['documents', 'metadatas', 'distances']
             )
             
@@ -158,19 +398,19 @@ class EmbeddingService:
             for i in range(len(results['documents'][0])):
                 content_lower = results['documents'][0][i].lower()
                 score = 1 / (1 + results['distances'][0][i])
-                keyword_bonus = sum(1 for keyword in query_keywords if keyword in content_lower)
+                score += keyword_bonus * sum(1 for keyword in query_keywords if keyword in content_lower)
                 if query_keywords and all(keyword in content_lower for keyword in query_keywords):
-                    score += 10
+                    score += all_keywords_bonus
                 candidates.append({
                     'content': results['documents'][0][i],
                     'metadata': results['metadatas'][0][i],
-                    'final_score': score + keyword_bonus
+                    'final_score': score
                 })
             
             candidates.sort(key=lambda x: x['final_score'], reverse=True)
 
             formatted = []
-            for candidate in candidates[:n_results]:
+            for candidate in candidates[offset:offset + n_results]:
                 formatted.append({
                     'content': candidate['content'],
                     'metadata': candidate['metadata'],
@@ -183,11 +423,13 @@ class EmbeddingService:
         Remove todos os dados armazenados no ChromaDB.
         """
         try:
-            self.chroma_client.delete_collection("wiki_knowledge_base")
+            self.chroma_client.delete_collection(self.collection_name)
             self.collection = self.chroma_client.get_or_create_collection(
-                name="wiki_knowledge_base",
+                name=self.collection_name,
                 metadata={"description": "Base de conhecimento da Wiki interna"}
             )
+            for listener in self.document_removed_listeners:
+                listener(None)
             print("Banco de dados vetorial limpo com sucesso.")
         except Exception as e:
             print(f"Erro ao limpar banco de dados vetorial: {e}")
\ No newline at end of file
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ResponseCache:
+    """
+    Cache em disco das respostas da API do MediaWiki.
+
+    Guarda dois tipos de entrada:
+    - respostas GET com ETag/Last-Modified, revalidadas com requisições condicionais;
+    - wikitext de páginas por Wiki (URL da API) e título, reutilizado enquanto a revisão não mudar.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(os.path.join(cache_dir, 'responses'), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, 'pages'), exist_ok=True)
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, entry: Dict):
+        # Escrita atômica para não deixar entradas corrompidas com requisições concorrentes
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get_response(self, key: str) -> Optional[Dict]:
+        return self._read(self._path('responses', key))
+
+    def put_response(self, key: str, etag: Optional[str], last_modified: Optional[str], body):
+        self._write(self._path('responses', key), {'etag': etag, 'last_modified': last_modified, 'body': body})
+
+    @staticmethod
+    def _page_key(api_url: str, title: str) -> str:
+        # O cliente é compartilhado entre Wikis: a mesma página (e revisão) pode existir em várias
+        return f"{api_url}#{title}"
+
+    def get_page(self, api_url: str, title: str, rev_id: int) -> Optional[Dict]:
+        entry = self._read(self._path('pages', self._page_key(api_url, title)))
+        if entry and entry.get('rev_id') == rev_id:
+            return entry
+        return None
+
+    def put_page(self, api_url: str, title: str, rev_id: int, wikitext: str):
+        self._write(self._path('pages', self._page_key(api_url, title)),
+                    {'title': title, 'rev_id': rev_id, 'wikitext': wikitext})
+
+
+class CappedRetry(Retry):
+    """Retry que respeita o Retry-After, mas nunca espera mais que `backoff_max` segundos."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, self.backoff_max) if retry_after is not None else None
+
+
+class MediaWikiHttpClient:
+    """
+    Camada HTTP compartilhada para todas as chamadas ao MediaWiki: pool de conexões
+    dimensionado, timeouts de conexão/leitura, retry com backoff em 429/5xx (respeitando
+    Retry-After até `max_wait` segundos), tratamento do erro `maxlag` da API, gzip e cache
+    condicional em disco.
+
+    Apenas GETs são repetidos: um POST (ex: action=login) não é idempotente e falha na hora.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5, read_timeout: float = 30,
+                 max_retries: int = 5, backoff_factor: float = 0.5, max_wait: float = 30,
+                 maxlag: Optional[int] = 5, cache_dir: Optional[str] = None, user_agent: str = "Wiki-IA/1.0"):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_wait = max_wait
+        self.maxlag = maxlag
+        self.user_agent = user_agent
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+
+        retry = CappedRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_max=max_wait,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # O mesmo adapter (e portanto o mesmo pool de conexões) é montado em todas as sessões
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    @classmethod
+    def from_env(cls) -> 'MediaWikiHttpClient':
+        maxlag = os.getenv("MEDIAWIKI_MAXLAG", "5")
+        return cls(
+            pool_size=int(os.getenv("MEDIAWIKI_POOL_SIZE", "10")),
+            connect_timeout=float(os.getenv("MEDIAWIKI_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("MEDIAWIKI_READ_TIMEOUT", "30")),
+            max_retries=int(os.getenv("MEDIAWIKI_MAX_RETRIES", "5")),
+            backoff_factor=float(os.getenv("MEDIAWIKI_BACKOFF_FACTOR", "0.5")),
+            max_wait=float(os.getenv("MEDIAWIKI_MAX_WAIT", "30")),
+            maxlag=int(maxlag) if maxlag else None,
+            cache_dir=os.getenv("MEDIAWIKI_CACHE_DIR", "./http_cache") or None
+        )
+
+    def new_session(self) -> requests.Session:
+        """
+        Cria uma sessão com cookies próprios (ex: um login) mas que reutiliza as conexões
+        TCP/TLS do pool compartilhado.
+        """
+        session = requests.Session()
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'User-Agent': self.user_agent})
+        return session
+
+    def _maxlag_delay(self, response: requests.Response, data, attempt: int) -> Optional[float]:
+        """Retorna quanto esperar se a API recusou a requisição por lag de replicação."""
+        if not isinstance(data, dict) or data.get('error', {}).get('code') != 'maxlag':
+            return None
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_wait)
+        return min(self.backoff_factor * (2 ** attempt), self.max_wait)
+
+    def get_json(self, session: requests.Session, url: str, params: Dict, use_cache: bool = True):
+        """
+        GET na API com revalidação condicional (If-None-Match / If-Modified-Since) quando há
+        uma resposta em cache, e novas tentativas enquanto a API responder `maxlag`.
+        """
+        cache_key = url + '?' + json.dumps(params, sort_keys=True)
+        cached = self.cache.get_response(cache_key) if self.cache and use_cache else None
+
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        request_params = dict(params)
+        if self.maxlag is not None:
+            request_params['maxlag'] = self.maxlag
+
+        for attempt in range(self.max_retries + 1):
+            response = session.get(url, params=request_params, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached:
+                return cached['body']
+            response.raise_for_status()
+            data = response.json()
+
+            delay = self._maxlag_delay(response, data, attempt)
+            if delay is None or attempt == self.max_retries:
+                break
+            print(f"MediaWiki com lag de replicação, aguardando {delay:.1f}s...")
+            time.sleep(delay)
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.cache and use_cache and (etag or last_modified):
+            self.cache.put_response(cache_key, etag, last_modified, data)
+        return data
+
+    def post_json(self, session: requests.Session, url: str, data: Dict):
+        """POST na API (sem cache e sem novas tentativas) com os mesmos timeouts."""
+        response = session.post(url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> MediaWikiHttpClient:
+    """Cliente HTTP do processo, criado na primeira chamada a partir das variáveis de ambiente."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = MediaWikiHttpClient.from_env()
+        return _http_client
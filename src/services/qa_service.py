@@ -35,7 +35,7 @@ class QAService:
         Gera uma resposta sintetizada e formatada usando o modelo Gemini.
         """
         if not self.model:
-            return {'answer': "O serviço de IA não está configurado corretamente.", 'confidence': 0.0, 'sources': []}
+            return {'answer': "O serviço de IA não está configurado corretamente.", 'confidence': 0.0, 'sources': [], 'error': True}
 
         if not context_chunks:
             return {'answer': 'Não encontrei informações na base de conhecimento para esta pergunta.', 'confidence': 0.0, 'sources': []}
@@ -66,6 +66,7 @@ class QAService:
         **SUA RESPOSTA COMPLETA E FORMATADA:**
         """
 
+        error = False
         try:
 
             response = self.model.generate_content(prompt)
@@ -73,6 +74,7 @@ class QAService:
         except Exception as e:
 
             answer = "Ocorreu um erro ao comunicar com o serviço de IA. Por favor, tente novamente."
+            error = True
 
         sources = self._extract_sources(context_chunks)
         confidence = self._calculate_confidence(context_chunks)
@@ -81,6 +83,7 @@ class QAService:
             'answer': answer,
             'confidence': round(confidence, 2),
             'sources': sources,
+            'error': error,
         }
         
 
@@ -91,13 +94,16 @@ class QAService:
         for chunk in context_chunks:
             if 'metadata' in chunk and chunk['metadata'] and 'document_id' in chunk['metadata']:
                 doc_id = chunk['metadata']['document_id']
-                if doc_id not in seen_ids:
+                # Ids de documentos só são únicos dentro de uma mesma Wiki
+                source_key = (chunk['metadata'].get('wiki'), doc_id)
+                if source_key not in seen_ids:
                     sources.append({
                         'title': chunk['metadata'].get('title', 'Título não disponível'),
                         'document_id': doc_id,
+                        'wiki': chunk['metadata'].get('wiki'),
                         'relevance': chunk.get('similarity_score', 0.0)
                     })
-                    seen_ids.add(doc_id)
+                    seen_ids.add(source_key)
         
         sources.sort(key=lambda x: x['relevance'], reverse=True)
         return sources[:5]
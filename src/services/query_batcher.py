@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class EncodeQueueFull(Exception):
+    """Levantada quando a fila de queries a codificar está cheia (backpressure)."""
+
+
+class QueryEncodeBatcher:
+    """
+    Agrupa queries que chegam em paralelo (ex: várias requisições /ask e /search no
+    servidor threaded do Flask) e as codifica numa única passada do modelo.
+
+    Uma thread de despacho espera a primeira query, continua a recolher queries por até
+    `window_ms` (ou até `max_batch_size`) e entrega a cada chamador o seu vetor.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], List[List[float]]], window_ms: float = 5,
+                 max_batch_size: int = 32, max_queue_size: int = 256, enqueue_timeout: float = 1.0):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._queries = 0
+        self._rejected = 0
+        self._max_batch_seen = 0
+        self._total_delay_ms = 0.0
+        self._max_delay_ms = 0.0
+        self._batch_size_counts: Dict[int, int] = {}
+
+        self._worker = threading.Thread(target=self._run, name="query-encode-batcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, query: str, timeout: float = 30.0) -> List[float]:
+        """
+        Enfileira uma query e bloqueia até o seu vetor estar pronto.
+
+        Levanta EncodeQueueFull se a fila continuar cheia após `enqueue_timeout` segundos.
+        """
+        future = Future()
+        try:
+            self._queue.put((query, future, time.perf_counter()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise EncodeQueueFull("Fila de codificação de queries cheia, tente novamente.")
+        return future.result(timeout=timeout)
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Janela esgotada: aproveita apenas o que já está na fila
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            try:
+                vectors = self.encode_fn([query for query, _, _ in batch])
+                for (_, future, _), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            self._record(batch, started)
+
+    def _record(self, batch: list, started: float):
+        delays = [(started - enqueued_at) * 1000 for _, _, enqueued_at in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._queries += len(batch)
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._batch_size_counts[len(batch)] = self._batch_size_counts.get(len(batch), 0) + 1
+            self._total_delay_ms += sum(delays)
+            self._max_delay_ms = max(self._max_delay_ms, max(delays))
+
+    def stats(self) -> Dict:
+        """Métricas de tamanho de lote e atraso de fila desde o início do processo."""
+        with self._stats_lock:
+            return {
+                'batches': self._batches,
+                'queries': self._queries,
+                'rejected': self._rejected,
+                'queue_size': self._queue.qsize(),
+                'avg_batch_size': round(self._queries / self._batches, 2) if self._batches else 0.0,
+                'max_batch_size': self._max_batch_seen,
+                'batch_size_counts': dict(sorted(self._batch_size_counts.items())),
+                'avg_queue_delay_ms': round(self._total_delay_ms / self._queries, 2) if self._queries else 0.0,
+                'max_queue_delay_ms': round(self._max_delay_ms, 2),
+            }
@@ -0,0 +1,96 @@
+import math
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Parâmetros de busca que podem variar entre configurações avaliadas
+DEFAULT_RETRIEVAL_CONFIG = {
+    'n_results': 5,
+    'n_candidates': 100,
+    'keyword_bonus': 1,
+    'all_keywords_bonus': 10,
+}
+
+
+def retrieve_batch(embedding_svc, questions: List[str], config: Optional[Dict] = None,
+                   max_workers: int = 8) -> Dict:
+    """
+    Codifica todas as perguntas numa única chamada ao modelo e executa a busca de cada
+    uma em paralelo. Retorna os chunks por pergunta e a latência de cada etapa.
+    """
+    config = {**DEFAULT_RETRIEVAL_CONFIG, **(config or {})}
+
+    start = time.perf_counter()
+    embeddings = embedding_svc.generate_embeddings(questions) if questions else []
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    def search(item):
+        question, embedding = item
+        started = time.perf_counter()
+        chunks = embedding_svc.search_similar_chunks(
+            question, keyword=embedding_svc.detect_keyword(question), query_embedding=embedding, **config
+        )
+        return chunks, (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(search, zip(questions, embeddings)))
+
+    return {
+        'embeddings': embeddings,
+        'chunks': [chunks for chunks, _ in results],
+        'encode_ms': encode_ms,
+        'retrieval_ms': [elapsed for _, elapsed in results],
+    }
+
+
+def ranked_titles(chunks: List[Dict]) -> List[str]:
+    """Títulos dos documentos na ordem em que aparecem pela primeira vez nos chunks."""
+    titles = []
+    for chunk in chunks:
+        title = chunk['metadata'].get('title')
+        if title not in titles:
+            titles.append(title)
+    return titles
+
+
+def latency_summary(values_ms: List[float]) -> Dict:
+    if not values_ms:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'mean_ms': 0.0}
+    ordered = sorted(values_ms)
+    return {
+        'p50_ms': round(statistics.median(ordered), 2),
+        'p95_ms': round(ordered[math.ceil(len(ordered) * 0.95) - 1], 2),
+        'mean_ms': round(statistics.fmean(ordered), 2),
+    }
+
+
+def evaluate_retrieval(embedding_svc, dataset: List[Dict], config: Optional[Dict] = None,
+                       ks=(1, 3, 5), max_workers: int = 8) -> Dict:
+    """
+    Mede a qualidade da busca para um conjunto de perguntas com os títulos esperados
+    (`{"question": ..., "expected_titles": [...]}`): recall@k, MRR e latência por etapa.
+    """
+    questions = [item['question'] for item in dataset]
+    batch = retrieve_batch(embedding_svc, questions, config, max_workers)
+
+    recall_at_k = {k: 0.0 for k in ks}
+    reciprocal_ranks = []
+    for item, chunks in zip(dataset, batch['chunks']):
+        expected = {title.lower() for title in item['expected_titles']}
+        titles = [title.lower() for title in ranked_titles(chunks)]
+        first_hit = next((rank for rank, title in enumerate(titles, 1) if title in expected), None)
+        reciprocal_ranks.append(1 / first_hit if first_hit else 0.0)
+        for k in ks:
+            if expected:
+                recall_at_k[k] += len(expected.intersection(titles[:k])) / len(expected)
+
+    total = len(dataset) or 1
+    return {
+        'config': {**DEFAULT_RETRIEVAL_CONFIG, **(config or {})},
+        'questions': len(dataset),
+        **{f'recall@{k}': round(recall_at_k[k] / total, 4) for k in ks},
+        'mrr': round(sum(reciprocal_ranks) / total, 4),
+        'encode_ms_per_question': round(batch['encode_ms'] / total, 2),
+        'retrieval': latency_summary(batch['retrieval_ms']),
+    }
@@ -0,0 +1,167 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional; sem ele servimos apenas gzip
+    brotli = None
+
+# Tipos que valem a pena comprimir (imagens PNG/JPG já são comprimidas)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Interpreta o Accept-Encoding em {codificação: qvalue} para br, gzip e identity,
+    respeitando q=0 (recusada) e o curinga "*". Sem o cabeçalho apenas identity é usada.
+    """
+    qvalues = {}
+    for token in header.split(','):
+        name, _, params = token.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+
+    wildcard = qvalues.get('*')
+    accepted = {}
+    for encoding in ('br', 'gzip'):
+        q = qvalues.get(encoding, wildcard)
+        if q is not None:
+            accepted[encoding] = q
+    # identity é sempre aceitável, a menos que seja recusada explicitamente ou pelo curinga
+    accepted['identity'] = qvalues.get('identity', wildcard if wildcard == 0 else 1.0)
+    return accepted
+
+
+class StaticAsset:
+    """Um arquivo estático já lido para memória, com as versões pré-comprimidas."""
+
+    def __init__(self, path: str, data: bytes, mimetype: str, hashed_path: Optional[str]):
+        self.path = path
+        self.hashed_path = hashed_path
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.variants = {'identity': data}
+
+        if mimetype.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    self.variants['br'] = compressed
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest[:20]}"' if encoding == 'identity' else f'"{self.digest[:20]}-{encoding}"'
+
+
+class StaticAssetManifest:
+    """
+    Manifesto em memória dos arquivos estáticos, montado uma única vez na inicialização.
+
+    Cada asset (CSS, JS, imagens) ganha um nome com hash do conteúdo (ex: JS/script.1a2b3c4d5e.js),
+    servido com cache imutável de longa duração. Os HTML têm as referências reescritas para
+    esses nomes e são servidos com revalidação por ETag. Substitui os os.path.exists por requisição.
+    """
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self.assets: Dict[str, StaticAsset] = {}
+        self._lookup: Dict[str, StaticAsset] = {}
+        self._build()
+
+    def _build(self):
+        html_files = []
+        for directory, _, files in os.walk(self.static_folder):
+            for file_name in files:
+                full_path = os.path.join(directory, file_name)
+                path = os.path.relpath(full_path, self.static_folder).replace(os.sep, '/')
+                if path.endswith('.html'):
+                    html_files.append(path)
+                    continue
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+                stem, extension = os.path.splitext(path)
+                hashed_path = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{extension}"
+                self._add(StaticAsset(path, data, self._mimetype(path), hashed_path))
+
+        # Os HTML por último, para já conhecerem os nomes com hash dos assets que referenciam
+        for path in html_files:
+            with open(os.path.join(self.static_folder, path), 'r', encoding='utf-8') as f:
+                html = self._rewrite_references(f.read())
+            self._add(StaticAsset(path, html.encode('utf-8'), 'text/html; charset=utf-8', None))
+
+        total = sum(len(asset.variants['identity']) for asset in self.assets.values())
+        print(f"Assets estáticos: {len(self.assets)} arquivos ({total} bytes) carregados no manifesto.")
+
+    @staticmethod
+    def _mimetype(path: str) -> str:
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        return f"{mimetype}; charset=utf-8" if mimetype.startswith('text/') else mimetype
+
+    def _add(self, asset: StaticAsset):
+        self.assets[asset.path] = asset
+        # Busca sem diferenciar maiúsculas (login.html referencia "css/" e "js/" mas as pastas são "CSS/" e "JS/")
+        self._lookup[asset.path.lower()] = asset
+        if asset.hashed_path:
+            self._lookup[asset.hashed_path.lower()] = asset
+
+    def _rewrite_references(self, html: str) -> str:
+        def replace(match):
+            asset = self._lookup.get(match.group(2).lstrip('/').lower())
+            if asset is None or not asset.hashed_path:
+                return match.group(0)
+            return f'{match.group(1)}="/{asset.hashed_path}"'
+        return re.sub(r'\b(src|href)="([^"#?:]+)"', replace, html)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self._lookup.get(path.lower())
+
+    def response(self, asset: StaticAsset, requested_path: str, request) -> Response:
+        """
+        Monta a resposta escolhendo a codificação de maior qvalue aceita pelo cliente
+        (no empate br > gzip > identity),
+        respondendo 304 quando o ETag enviado ainda é válido.
+        """
+        accepted = parse_accept_encoding(request.headers.get('Accept-Encoding', ''))
+        # Maior qvalue aceito; no empate vale a ordem de preferência do servidor
+        ranked = sorted(
+            (candidate for candidate in ('br', 'gzip', 'identity')
+             if candidate in asset.variants and accepted.get(candidate, 0) > 0),
+            key=lambda candidate: -accepted[candidate]
+        )
+        if not ranked:
+            return Response(status=406, headers={'Vary': 'Accept-Encoding'})
+        encoding = ranked[0]
+
+        immutable = asset.hashed_path is not None and requested_path.lower() == asset.hashed_path.lower()
+        headers = {
+            'ETag': asset.etag(encoding),
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Vary': 'Accept-Encoding'
+        }
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if any(asset.etag(variant) in if_none_match for variant in asset.variants) or if_none_match.strip() == '*':
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(asset.variants[encoding], status=200, content_type=asset.mimetype, headers=headers)
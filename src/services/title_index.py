@@ -0,0 +1,65 @@
+import re
+import threading
+import unicodedata
+from typing import Dict, Set
+from sqlalchemy import select
+from src.models.wiki import WikiDocument, WikiTitleToken
+
+
+def normalize_title(title: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples ("Rejeição  528" -> "rejeicao 528")."""
+    text = unicodedata.normalize('NFKD', title.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def title_tokens(title: str) -> Set[str]:
+    """Tokens indexados de um título: códigos numéricos (3+ dígitos) e palavras com mais de 3 letras."""
+    tokens = set()
+    for token in re.findall(r'\w+', normalize_title(title)):
+        if (token.isdigit() and len(token) >= 3) or len(token) > 3:
+            tokens.add(token[:100])
+    return tokens
+
+
+def index_document_title(document: WikiDocument):
+    """Preenche os tokens do título do documento, gravados na mesma transação que ele."""
+    document.title_tokens = [WikiTitleToken(token=token) for token in sorted(title_tokens(document.title))]
+
+
+class TitleIndex:
+    """
+    Consulta ao índice de títulos da tabela wiki_title_tokens, lida a cada busca: páginas
+    indexadas por outro processo (ex: CLI ingest_dump) aparecem sem reiniciar o servidor.
+    Usa um engine próprio, então funciona nas threads de busca, fora do app context do Flask.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._backfill_lock = threading.Lock()
+        self._backfilled = False
+
+    def backfill(self):
+        """Indexa uma única vez os títulos de documentos gravados antes de o índice existir."""
+        with self._backfill_lock:
+            if self._backfilled:
+                return
+            has_tokens = select(WikiTitleToken.id).where(WikiTitleToken.document_id == WikiDocument.id).exists()
+            with self.engine.begin() as connection:
+                missing = connection.execute(select(WikiDocument.id, WikiDocument.title).where(~has_tokens)).all()
+                rows = [{'document_id': document_id, 'token': token}
+                        for document_id, title in missing for token in title_tokens(title)]
+                if rows:
+                    connection.execute(WikiTitleToken.__table__.insert(), rows)
+            if rows:
+                print(f"Índice de títulos: {len(missing)} documentos indexados.")
+            self._backfilled = True
+
+    def documents_with_token(self, token: str) -> Dict[int, str]:
+        """Documentos (id -> título) cujo título contém o token (ex: o código "528")."""
+        self.backfill()
+        query = select(WikiDocument.id, WikiDocument.title).join(
+            WikiTitleToken, WikiTitleToken.document_id == WikiDocument.id
+        ).where(WikiTitleToken.token == normalize_title(token))
+        with self.engine.connect() as connection:
+            return {document_id: title for document_id, title in connection.execute(query)}
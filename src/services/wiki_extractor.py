@@ -1,24 +1,65 @@
-import requests
 import re
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Optional
+from src.services.http_client import MediaWikiHttpClient, get_http_client
+
+
+def clean_wikitext(wikitext: str) -> str:
+    """
+    Versão final da limpeza de texto, otimizada para templates com campos.
+    """
+    # Converte <br> em quebras de linha
+    text = re.sub(r'<br\s*/?>', '\n', wikitext, flags=re.IGNORECASE)
+
+    # Remove a definição do template e as chaves finais, mantendo o conteúdo
+    text = re.sub(r'\{\{FAQ erros', '', text, flags=re.IGNORECASE)
+    text = text.replace('}}', '')
+
+    # Converte o pipe | (separador de campos) em uma quebra de linha, para isolar cada campo
+    text = text.replace('|', '\n')
+    
+    # Remove links internos mas mantém o texto
+    text = re.sub(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]', r'\1', text)
+    
+    # Remove links externos, mantendo o texto
+    text = re.sub(r'\[http[^\s\]]*\s*([^\]]*)\]', r'\1', text)
+
+    # Remove formatação
+    text = re.sub(r"'''|''", "", text)
+    
+    # Remove cabeçalhos
+    text = re.sub(r'=+\s*(.*?)\s*=+_?', r'\1', text, flags=re.MULTILINE)
+    
+    # Remove tags HTML restantes
+    text = re.sub(r'<[^>]*>', '', text)
+    
+    # Remove tags de Categoria
+    text = re.sub(r'\[\[Categoria:[^\]]*\]\]', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'Categoria:[^\n\r]*', '', text, flags=re.IGNORECASE)
+
+    # Limpeza final de espaços e linhas
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text).strip()
+    
+    return text
+
 
 class MediaWikiExtractor:
     """Classe para extrair conteúdo de uma Wiki MediaWiki"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, http_client: Optional[MediaWikiHttpClient] = None):
         """
         Inicializa o extrator com a URL base da Wiki
         
         Args:
             base_url: URL base da Wiki MediaWiki (ex: https://wiki.empresa.com)
+            http_client: camada HTTP a usar (por padrão o cliente compartilhado do processo)
         """
         self.base_url = base_url.rstrip('/')
         self.api_url = f"{self.base_url}/api.php"
-        self.session = requests.Session()
-
-
-
+        self.http = http_client or get_http_client()
+        # Cookies próprios deste extrator, conexões do pool compartilhado
+        self.session = self.http.new_session()
 
     def login(self, username: str, password: str) -> bool:
         """
@@ -32,14 +73,12 @@ class MediaWikiExtractor:
             True se o login for bem-sucedido, False caso contrário
         """
         try:
-            response = self.session.post(self.api_url, data={
+            data = self.http.post_json(self.session, self.api_url, {
                 'action': 'login',
                 'lgname': username,
                 'lgpassword': password,
                 'format': 'json'
             })
-            response.raise_for_status()
-            data = response.json()
             
             if data.get('login', {}).get('result') == 'Success':
                 print("Login bem-sucedido")
@@ -71,9 +110,7 @@ class MediaWikiExtractor:
                 params['apcontinue'] = apcontinue
             
             try:
-                response = self.session.get(self.api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
+                data = self.http.get_json(self.session, self.api_url, params)
                 
                 if 'query' in data and 'allpages' in data['query']:
                     pages.extend(data['query']['allpages'])
@@ -88,28 +125,60 @@ class MediaWikiExtractor:
 
         return pages
     
-    def get_page_content(self, page_title: str) -> Optional[Dict]:
+    def get_latest_revisions(self, titles: List[str], batch_size: int = 50) -> Dict[str, int]:
+        """
+        Obtém o id da última revisão de cada página, consultando `prop=info` em lotes
+        (chamada leve, sem o conteúdo das páginas).
+        """
+        revisions = {}
+        for start in range(0, len(titles), batch_size):
+            params = {
+                'action': 'query',
+                'titles': '|'.join(titles[start:start + batch_size]),
+                'prop': 'info',
+                'format': 'json'
+            }
+            try:
+                data = self.http.get_json(self.session, self.api_url, params, use_cache=False)
+                for page_data in data.get('query', {}).get('pages', {}).values():
+                    if 'lastrevid' in page_data:
+                        revisions[page_data['title']] = page_data['lastrevid']
+            except Exception as e:
+                print(f"Erro ao obter revisões das páginas: {e}")
+        return revisions
+
+    def get_page_content(self, page_title: str, rev_id: Optional[int] = None) -> Optional[Dict]:
         """
         Obtém o conteúdo de uma página específica
         
         Args:
             page_title: Título da página
+            rev_id: última revisão conhecida; se o wikitext dessa revisão estiver no cache
+                em disco, a página não é baixada novamente
             
         Returns:
-            Dicionário com título, conteúdo e URL da página
+            Dicionário com título, conteúdo, URL e revisão da página
         """
+        cache = self.http.cache
+        cached = cache.get_page(self.api_url, page_title, rev_id) if cache and rev_id else None
+        if cached:
+            return {
+                'title': cached['title'],
+                'content': self._clean_wikitext(cached['wikitext']),
+                'url': f"{self.base_url}/index.php?title={page_title.replace(' ', '_')}",
+                'rev_id': rev_id
+            }
+
         params = {
             'action': 'query',
             'titles': page_title,
             'prop': 'revisions',
-            'rvprop': 'content',
+            'rvprop': 'ids|content',
             'format': 'json'
         }
         
         try:
-            response = self.session.get(self.api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self.http.get_json(self.session, self.api_url, params, use_cache=False)
             
             if 'query' in data and 'pages' in data['query']:
                 pages = data['query']['pages']
@@ -118,13 +187,17 @@ class MediaWikiExtractor:
                 if page_id != '-1':  # Página existe
                     page_data = pages[page_id]
                     if 'revisions' in page_data:
-                        wikitext = page_data['revisions'][0]['*']
+                        revision = page_data['revisions'][0]
+                        wikitext = revision['*']
                         clean_content = self._clean_wikitext(wikitext)
+                        if cache and 'revid' in revision:
+                            cache.put_page(self.api_url, page_title, revision['revid'], wikitext)
                         
                         return {
                             'title': page_data['title'],
                             'content': clean_content,
-                            'url': f"{self.base_url}/index.php?title={page_title.replace(' ', '_')}"
+                            'url': f"{self.base_url}/index.php?title={page_title.replace(' ', '_')}",
+                            'rev_id': revision.get('revid')
                         }
                         
         except Exception as e:
@@ -136,40 +209,7 @@ class MediaWikiExtractor:
         """
         Versão final da limpeza de texto, otimizada para templates com campos.
         """
-        # Converte <br> em quebras de linha
-        text = re.sub(r'<br\s*/?>', '\n', wikitext, flags=re.IGNORECASE)
-
-        # Remove a definição do template e as chaves finais, mantendo o conteúdo
-        text = re.sub(r'\{\{FAQ erros', '', text, flags=re.IGNORECASE)
-        text = text.replace('}}', '')
-
-        # Converte o pipe | (separador de campos) em uma quebra de linha, para isolar cada campo
-        text = text.replace('|', '\n')
-        
-        # Remove links internos mas mantém o texto
-        text = re.sub(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]', r'\1', text)
-        
-        # Remove links externos, mantendo o texto
-        text = re.sub(r'\[http[^\s\]]*\s*([^\]]*)\]', r'\1', text)
-
-        # Remove formatação
-        text = re.sub(r"'''|''", "", text)
-        
-        # Remove cabeçalhos
-        text = re.sub(r'=+\s*(.*?)\s*=+_?', r'\1', text, flags=re.MULTILINE)
-        
-        # Remove tags HTML restantes
-        text = re.sub(r'<[^>]*>', '', text)
-        
-        # Remove tags de Categoria
-        text = re.sub(r'\[\[Categoria:[^\]]*\]\]', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Categoria:[^\n\r]*', '', text, flags=re.IGNORECASE)
-
-        # Limpeza final de espaços e linhas
-        text = re.sub(r'[ \t]+', ' ', text)
-        text = re.sub(r'\n\s*\n+', '\n\n', text).strip()
-        
-        return text
+        return clean_wikitext(wikitext)
     
     def extract_all_content(self) -> List[Dict]:
         """
@@ -178,6 +218,9 @@ class MediaWikiExtractor:
 
         pages = self.get_all_pages()
         print(f"Encontradas {len(pages)} páginas na lista inicial.")
+
+        # Revisões atuais, para reaproveitar do cache em disco as páginas que não mudaram
+        revisions = self.get_latest_revisions([page['title'] for page in pages if 'title' in page])
         
         content_list = []
         
@@ -187,7 +230,7 @@ class MediaWikiExtractor:
 
 
             # Etapa 1: Tentar obter o conteúdo da página
-            content = self.get_page_content(page_title)
+            content = self.get_page_content(page_title, revisions.get(page_title))
             
             if content:
 
@@ -208,3 +251,39 @@ class MediaWikiExtractor:
         print(f"Total de páginas com conteúdo válido extraído: {len(content_list)}")
         return content_list
 
+    def extract_changed_content(self, known_revisions: Dict[int, int]) -> Dict:
+        """
+        Extrai apenas as páginas cuja revisão atual difere da registrada em `known_revisions`
+        ({page_id: rev_id}); as demais nem são baixadas.
+
+        Returns:
+            {'pages': [...], 'total_pages': n, 'unchanged': n, 'failed': n}. Cada página traz
+            page_id e rev_id e pode ter conteúdo vazio (ficou vazia após a limpeza), para que o
+            documento anterior seja removido e a revisão registrada.
+        """
+        pages = self.get_all_pages()
+        print(f"Encontradas {len(pages)} páginas na lista inicial.")
+        revisions = self.get_latest_revisions([page['title'] for page in pages if 'title' in page])
+
+        result = {'pages': [], 'total_pages': len(pages), 'unchanged': 0, 'failed': 0}
+        for page in pages:
+            page_title = page.get('title')
+            page_id = page.get('pageid')
+            rev_id = revisions.get(page_title)
+            if page_id is not None and rev_id is not None and known_revisions.get(page_id) == rev_id:
+                result['unchanged'] += 1
+                continue
+
+            content = self.get_page_content(page_title, rev_id)
+            if not content:
+                print(f"  ❌ FALHA: Não foi possível obter o conteúdo da API para a página '{page_title}'.")
+                result['failed'] += 1
+                continue
+            content['page_id'] = page_id
+            result['pages'].append(content)
+
+        print(f"\n--- EXTRAÇÃO CONCLUÍDA ---")
+        print(f"Páginas sem alteração: {result['unchanged']}; a indexar: {len(result['pages'])}; "
+              f"falhas: {result['failed']}")
+        return result
+
@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from src.models.wiki import db
+from src.services.embedding_service import DEFAULT_COLLECTION_NAME, EmbeddingService
+from src.services.title_index import TitleIndex
+
+DEFAULT_WIKI = "default"
+# Banco da aplicação (o mesmo de SQLALCHEMY_DATABASE_URI em main.py), usado pela Wiki padrão
+APP_DATABASE_FILE = "app.db"
+
+# Nomes de Wiki viram nome de arquivo ({nome}.db) e de coleção (wiki_{nome})
+WIKI_NAME_PATTERN = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9_-]*[A-Za-z0-9])?$')
+# Regras de nome de coleção do ChromaDB: 3 a 512 caracteres, começando e terminando com letra ou número
+COLLECTION_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{1,510}[A-Za-z0-9]$')
+
+
+class UnknownWikiError(Exception):
+    """Levantada quando uma requisição pede uma Wiki que não está no registro."""
+
+
+class WikiSelectionError(Exception):
+    """Levantada quando a seleção de Wikis da requisição é inválida (ex: lista vazia)."""
+
+
+class WikiContext:
+    """
+    Uma Wiki registrada: URL, credenciais, coleção no ChromaDB e banco SQLite próprios
+    (documentos, chunks e estado da sincronização).
+    """
+
+    def __init__(self, name: str, url: Optional[str], username: Optional[str] = None,
+                 password: Optional[str] = None, collection_name: Optional[str] = None,
+                 database_uri: Optional[str] = None, app_database: bool = False):
+        self.name = name
+        self.url = url
+        self.username = username
+        self.password = password
+        self.collection_name = collection_name or (DEFAULT_COLLECTION_NAME if name == DEFAULT_WIKI else f"wiki_{name}")
+        # Com app_database (ou sem database_uri) a Wiki usa a sessão do Flask-SQLAlchemy sobre o
+        # banco da aplicação (app.db), como antes do registro; database_uri aponta para o mesmo arquivo
+        self.database_uri = database_uri
+        self.app_database = app_database or database_uri is None
+        self._engine = None
+        self._session = None
+        self._session_lock = threading.RLock()
+        self.embedding_service: Optional[EmbeddingService] = None
+
+    @property
+    def engine(self):
+        """
+        Engine próprio do banco desta Wiki (None sem database_uri). Serve também para
+        leituras fora do app context do Flask, como o índice de títulos nas threads de busca.
+        """
+        if self.database_uri is None:
+            return None
+        # Requisições concorrentes não podem criar (e vazar) um segundo engine
+        with self._session_lock:
+            if self._engine is None:
+                self._engine = create_engine(self.database_uri)
+                db.metadata.create_all(self._engine)
+            return self._engine
+
+    @property
+    def session(self):
+        """Sessão SQLAlchemy desta Wiki (a sessão do Flask-SQLAlchemy para a Wiki padrão)."""
+        if self.app_database:
+            return db.session
+        with self._session_lock:
+            if self._session is None:
+                self._session = scoped_session(sessionmaker(bind=self.engine))
+            return self._session
+
+    def remove_session(self):
+        if self._session is not None:
+            self._session.remove()
+
+
+class WikiRegistry:
+    """
+    Registro das Wikis atendidas pela aplicação. Todas compartilham um único modelo de
+    embeddings carregado no processo; cada uma tem a sua coleção, tabelas e estado de sync.
+
+    Configuração por WIKI_REGISTRY (caminho de um JSON) no formato:
+        {"suporte": {"url": "https://wiki-suporte", "username_env": "SUPORTE_WIKI_USERNAME",
+                     "password_env": "SUPORTE_WIKI_PASSWORD"}, "dev": {"url": "..."}}
+    Sem registro, existe apenas a Wiki "default" de MEDIAWIKI_URL / WIKI_USERNAME / WIKI_PASSWORD.
+    """
+
+    def __init__(self, wikis: Dict[str, WikiContext]):
+        self.wikis = wikis
+        self._lock = threading.Lock()
+        self._shared_service: Optional[EmbeddingService] = None
+        # Callbacks chamados com a WikiContext quando o seu serviço de embeddings é criado
+        self.service_created_listeners = []
+
+    @classmethod
+    def from_env(cls, database_dir: str) -> 'WikiRegistry':
+        def database_uri(file_name: str) -> str:
+            database_path = os.path.abspath(os.path.join(database_dir, file_name)).replace('\\', '/')
+            return f"sqlite:///{database_path}"
+
+        registry_path = os.getenv("WIKI_REGISTRY")
+        if not registry_path:
+            return cls({DEFAULT_WIKI: WikiContext(
+                DEFAULT_WIKI, os.getenv("MEDIAWIKI_URL"), os.getenv("WIKI_USERNAME"), os.getenv("WIKI_PASSWORD"),
+                database_uri=database_uri(APP_DATABASE_FILE), app_database=True
+            )})
+
+        with open(registry_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        wikis = {}
+        for name, options in config.items():
+            if not WIKI_NAME_PATTERN.match(name) or name == "all":
+                raise ValueError(f"Nome de Wiki inválido em {registry_path}: '{name}'. "
+                                 "Use letras, números, '_' ou '-' (e não 'all').")
+            collection_name = options.get('collection') or (
+                DEFAULT_COLLECTION_NAME if name == DEFAULT_WIKI else f"wiki_{name}"
+            )
+            if not COLLECTION_NAME_PATTERN.match(collection_name) or '..' in collection_name:
+                raise ValueError(f"Nome de coleção inválido para a Wiki '{name}': '{collection_name}'.")
+            wikis[name] = WikiContext(
+                name,
+                options.get('url'),
+                username=os.getenv(options['username_env']) if options.get('username_env') else None,
+                password=os.getenv(options['password_env']) if options.get('password_env') else None,
+                collection_name=collection_name,
+                database_uri=database_uri(APP_DATABASE_FILE if name == DEFAULT_WIKI else f"{name}.db"),
+                app_database=name == DEFAULT_WIKI
+            )
+        return cls(wikis)
+
+    def names(self) -> List[str]:
+        return list(self.wikis)
+
+    @property
+    def default_name(self) -> str:
+        return DEFAULT_WIKI if DEFAULT_WIKI in self.wikis else next(iter(self.wikis))
+
+    def get(self, name: Optional[str] = None) -> WikiContext:
+        """Retorna a Wiki pedida (ou a padrão). Levanta UnknownWikiError se não estiver registrada."""
+        if name is not None and not isinstance(name, str):
+            raise WikiSelectionError("O nome da Wiki deve ser um texto")
+        name = name or self.default_name
+        if name not in self.wikis:
+            raise UnknownWikiError(f"Wiki '{name}' não registrada. Disponíveis: {', '.join(self.wikis)}")
+        return self.wikis[name]
+
+    def resolve(self, names) -> List[WikiContext]:
+        """Aceita um nome, uma lista de nomes, "all" ou None (Wiki padrão)."""
+        if names is None:
+            return [self.get()]
+        if names == "all":
+            return list(self.wikis.values())
+        if isinstance(names, str):
+            names = [names]
+        if not isinstance(names, list) or not names:
+            raise WikiSelectionError("wiki deve ser um nome, uma lista não vazia de nomes ou \"all\"")
+        return [self.get(name) for name in names]
+
+    @property
+    def shared_service(self) -> Optional[EmbeddingService]:
+        """Serviço que carregou o modelo compartilhado (None enquanto nenhum foi criado)."""
+        return self._shared_service
+
+    def embedding_service(self, wiki: WikiContext) -> EmbeddingService:
+        """
+        Serviço de embeddings da Wiki, criado sob demanda. O primeiro carrega o modelo;
+        os demais reutilizam-no através de EmbeddingService.with_collection.
+        """
+        with self._lock:
+            if wiki.embedding_service is None:
+                title_index = TitleIndex(wiki.engine) if wiki.engine is not None else None
+                if self._shared_service is None:
+                    wiki.embedding_service = EmbeddingService(
+                        collection_name=wiki.collection_name, title_index=title_index
+                    )
+                    self._shared_service = wiki.embedding_service
+                else:
+                    wiki.embedding_service = self._shared_service.with_collection(wiki.collection_name, title_index)
+                for listener in self.service_created_listeners:
+                    listener(wiki)
+            return wiki.embedding_service
+
+    def search(self, wikis: List[WikiContext], query: str, n_results: int = 5, keyword: str = None,
+               query_embedding=None, offset: int = 0, **kwargs) -> List[dict]:
+        """
+        Busca em uma ou várias Wikis. Com várias, as buscas rodam em paralelo (a query é
+        codificada uma única vez) e os resultados são unidos pela pontuação.
+        Cada chunk traz a Wiki de origem em metadata['wiki'].
+        """
+        services = [self.embedding_service(wiki) for wiki in wikis]
+        if query_embedding is None and keyword is None:
+            query_embedding = services[0].encode_query(query)
+
+        # Com várias Wikis cada uma devolve offset + n_results e a paginação é feita após a união
+        per_wiki_results = n_results if len(wikis) == 1 else offset + n_results
+        per_wiki_offset = offset if len(wikis) == 1 else 0
+
+        def search_one(item):
+            wiki, service = item
+            chunks = service.search_similar_chunks(
+                query, n_results=per_wiki_results, keyword=keyword, query_embedding=query_embedding,
+                offset=per_wiki_offset, **kwargs
+            )
+            for chunk in chunks:
+                chunk['metadata']['wiki'] = wiki.name
+            return chunks
+
+        if len(wikis) == 1:
+            return search_one((wikis[0], services[0]))
+
+        with ThreadPoolExecutor(max_workers=len(wikis)) as executor:
+            per_wiki = list(executor.map(search_one, zip(wikis, services)))
+
+        merged = [chunk for chunks in per_wiki for chunk in chunks]
+        merged.sort(key=lambda chunk: chunk['similarity_score'], reverse=True)
+        # Na busca por código cada Wiki devolve a página inteira, então não há corte
+        return merged[offset:] if keyword else merged[offset:offset + n_results]
+
+    def remove_sessions(self):
+        for wiki in self.wikis.values():
+            wiki.remove_session()